@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark de TausteSpider.extract_products: tempo por página antes e depois
+do caminho estruturado (li.product-item)
+
+"Antes" reproduz o caminho antigo: as varreduras `*:contains("R$")` e
+`strong, b` sobre o documento inteiro seguidas da regex DOTALL principal.
+O fallback antigo (`(.*?)\\s*\\*\\*...`) fica de fora: sem `**` na página
+ele é quadrático (~30 s para 40 KB) e não termina em tempo útil em 360 KB.
+
+Uso: python benchmarks/bench_tauste_extract.py [--repeat 10]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'coleta'))
+
+from scrapy.http import HtmlResponse
+
+import fixtures
+from coleta.spiders.tauste import TausteSpider
+
+
+LEGACY_PATTERN = re.compile(r'(\d+)\.\s*(\d+)\s*(.*?)\s*\*\*(.*?)\*\*\s*R\$\s*([\d,]+)', re.DOTALL)
+
+
+def legacy_extract_products(response):
+    """Caminho antigo de extract_products (sem o fallback quadrático)"""
+    price_elements = response.css('*:contains("R$")')
+    if not price_elements:
+        return []
+    response.css('strong, b')
+    return LEGACY_PATTERN.findall(response.text)
+
+
+def load_pages():
+    """(nome, HtmlResponse) das capturas salvas e das páginas sintéticas"""
+    pages = []
+    for path in fixtures.saved_pages():
+        with open(path, 'rb') as f:
+            body = f.read()
+        pages.append((os.path.basename(path), HtmlResponse(fixtures.TAUSTE_BASE_URL, body=body, encoding='utf-8')))
+    for page in (1, 2, 3):
+        body = fixtures.tauste_listing_html(page=page).encode('utf-8')
+        pages.append((f'sintetica p={page}', HtmlResponse(fixtures.tauste_page_url(page), body=body, encoding='utf-8')))
+    return pages
+
+
+def timed(function, response, repeat):
+    """Menor tempo (ms) de `repeat` execuções, com a árvore já parseada"""
+    response.selector  # parse do HTML fora da medição
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(response)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    
+    spider = TausteSpider()
+    print(f"{'página':<32} {'KB':>6} {'antes ms':>10} {'depois ms':>10} {'itens':>6} {'x':>6}")
+    for name, response in load_pages():
+        before, _ = timed(legacy_extract_products, response, args.repeat)
+        after, items = timed(spider.extract_products, response, args.repeat)
+        print(f"{name:<32} {len(response.body) // 1024:>6} {before:>10.2f} {after:>10.2f} {items:>6} {before / after:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
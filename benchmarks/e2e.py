@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta: `scrapy crawl` completo contra o servidor local
+(benchmarks/standin.py), com engine, middlewares e pipelines de verdade
+
+O servidor sobe neste processo e o crawl roda em um subprocesso com as URLs
+apontadas para ele; nenhum request sai da máquina. Ao final mostra, na
+janela vista pelo servidor (primeiro request até a última resposta):
+
+    páginas/s   listagens, PDPs e respostas da API servidas com 200
+    itens/s     itens exportados pelo feed
+    bytes/s     bytes de corpo servidos (páginas + imagens)
+    429         respostas bloqueadas pelas rajadas de `--throttle`
+
+Uso:
+    python benchmarks/e2e.py mercadolivre --pages 10
+    python benchmarks/e2e.py mercadolivre --latency lognormal:80:0.5 --throttle 50:5
+    python benchmarks/e2e.py tauste -a backend=graphql
+    python benchmarks/e2e.py tauste --no-images -s CONCURRENT_REQUESTS_PER_DOMAIN=8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from standin import StandInServer
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_ROUTES = ('ml/lista', 'ml/produto', 'tauste/html', 'tauste/graphql')
+
+
+def spider_args(spider, server, pages):
+    """Argumentos `-a` que apontam o spider para o servidor local"""
+    if spider == 'mercadolivre':
+        args = ['-a', f"queries={server.url('/ml/lista/tenis-corrida-masculino')}"]
+    else:
+        args = ['-a', f"start_url={server.url('/sorocaba3/padaria.html')}"]
+    if pages:
+        args += ['-a', f'max_pages={pages}']
+    return args
+
+
+def crawl(spider, server, options):
+    """Roda o crawl e devolve (itens exportados, segundos de parede, código de saída)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'items.jl')
+        settings = [
+            f"IMAGES_STORE={os.path.join(tmp, 'images')}",
+            'PRODUCT_IMAGE_CACHE_PATH=',  # toda execução resolve as PDPs
+            f'LOG_LEVEL={options.log_level}',
+        ]
+        if options.no_images:
+            settings.append('ITEM_PIPELINES={}')
+        settings.extend(options.settings)
+        command = [sys.executable, '-m', 'scrapy', 'crawl', spider]
+        command += spider_args(spider, server, options.pages)
+        for arg in options.spider_args:
+            command += ['-a', arg]
+        for setting in settings:
+            command += ['-s', setting]
+        command += ['-o', f'{output}:jsonlines']
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=os.path.join(ROOT, 'coleta'))
+        wall = time.perf_counter() - started
+        items = 0
+        if os.path.exists(output):
+            with open(output, encoding='utf-8') as f:
+                items = sum(1 for line in f if line.strip())
+        return items, wall, result.returncode
+
+
+def report(server, items, wall):
+    elapsed = server.elapsed or wall
+    pages = sum(server.statuses[f'{route}/200'] for route in PAGE_ROUTES)
+    throttled = sum(count for key, count in server.statuses.items() if key.endswith('/429'))
+    total_bytes = sum(server.bytes_sent.values())
+    return {
+        'wall_s': round(wall, 2),
+        'crawl_s': round(elapsed, 2),
+        'requests': sum(server.hits.values()),
+        'pages': pages,
+        'items': items,
+        'bytes': total_bytes,
+        'throttled': throttled,
+        'pages_per_s': round(pages / elapsed, 2) if elapsed else 0.0,
+        'items_per_s': round(items / elapsed, 2) if elapsed else 0.0,
+        'bytes_per_s': round(total_bytes / elapsed) if elapsed else 0,
+        'statuses': dict(sorted(server.statuses.items())),
+    }
+
+
+def print_report(spider, result):
+    print(f"\n{spider}: {result['pages']} páginas, {result['items']} itens, "
+          f"{result['requests']} requests em {result['crawl_s']:.2f}s "
+          f"(parede {result['wall_s']:.2f}s)")
+    print(f"  páginas/s  {result['pages_per_s']:>10.2f}")
+    print(f"  itens/s    {result['items_per_s']:>10.2f}")
+    print(f"  KB/s       {result['bytes_per_s'] / 1024:>10.1f}")
+    print(f"  429        {result['throttled']:>10}")
+    for key, count in result['statuses'].items():
+        print(f"    {key:<24}{count:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('spider', choices=('mercadolivre', 'tauste'))
+    parser.add_argument('--pages', type=int, default=None, help='max_pages do spider')
+    parser.add_argument('--ml-total', type=int, default=480, help='resultados da busca do MercadoLivre')
+    parser.add_argument('--tauste-total', type=int, default=187, help='produtos da categoria do Tauste')
+    parser.add_argument('--latency', default=None, help="fixed:ms, uniform:min:max ou lognormal:mediana:sigma")
+    parser.add_argument('--throttle', default=None, help="N:M = M respostas 429 a cada N páginas")
+    parser.add_argument('--no-graphql', action='store_true', help='API GraphQL do Tauste fora do ar')
+    parser.add_argument('--no-images', action='store_true', help='crawl sem os pipelines')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-a', dest='spider_args', action='append', default=[], metavar='NOME=VALOR')
+    parser.add_argument('-s', dest='settings', action='append', default=[], metavar='NOME=VALOR')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    options = parser.parse_args()
+
+    server = StandInServer(
+        total=options.tauste_total, graphql=not options.no_graphql, seed=options.seed,
+        ml_total=options.ml_total, latency=options.latency, throttle=options.throttle,
+    )
+    with server:
+        items, wall, returncode = crawl(options.spider, server, options)
+
+    result = report(server, items, wall)
+    if options.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(options.spider, result)
+    return returncode
+
+
+if __name__ == '__main__':
+    sys.exit(main())
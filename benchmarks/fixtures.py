@@ -0,0 +1,304 @@
+"""
+Páginas sintéticas para os benchmarks
+
+As capturas debug_tauste*.html da raiz do projeto são páginas reais, mas
+foram salvas sem descomprimir o corpo; estes geradores produzem páginas
+com a marcação que os spiders esperam e tamanho parecido com o real
+(~360 KB), de forma determinística (mesmo `seed`, mesma página).
+"""
+
+import glob
+import os
+import random
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SELECTED = ' selected="selected"'
+TAUSTE_BASE_URL = 'https://tauste.com.br/sorocaba3/padaria.html'
+TAUSTE_BRANDS = [
+    'Tauste', 'Cartuxa', 'Don Luciano', 'Ceremony', 'Santa Carolina', 'Villa Fabrizia',
+    'Norton', 'Pata Negra', 'Mosketto', 'Perini', 'Zolla', 'Concha Y Toro', 'Trivento',
+]
+TAUSTE_WORDS = [
+    'Pão', 'Francês', 'Integral', 'Bisnaguinha', 'Bolo', 'Cenoura', 'Chocolate', 'Torrada',
+    'Queijo', 'Forma', 'Australiano', 'Sovado', 'Milho', 'Coco', 'Croissant', 'Manteiga',
+    'Doce', 'Leite', 'Pacote', 'Unidade', 'Fatiado', 'Tradicional', 'Grãos', 'Aveia',
+]
+
+
+def saved_pages():
+    """Caminhos das capturas debug_tauste*.html salvas na raiz do projeto"""
+    return sorted(glob.glob(os.path.join(ROOT, 'debug_tauste*.html')))
+
+
+def _chrome(rng, size):
+    """Cabeçalho/menu/scripts do tema: volume de marcação sem produtos"""
+    parts = ['<header class="page-header"><nav class="navigation"><ul>']
+    i = 0
+    while sum(map(len, parts)) < size:
+        i += 1
+        label = ' '.join(rng.choice(TAUSTE_WORDS) for _ in range(2))
+        parts.append(
+            f'<li class="level1 nav-{i}"><a href="https://tauste.com.br/sorocaba3/cat-{i}.html">'
+            f'<span>{label}</span></a><div class="submenu"><span class="badge">Novo</span></div></li>'
+        )
+        if i % 40 == 0:
+            parts.append(
+                '<script type="text/x-magento-init">{"*":{"Magento_Ui/js/core/app":'
+                f'{{"components":{{"block-{i}":{{"component":"Magento_Theme/js/view/breadcrumbs"}}}}}}}}}}</script>'
+            )
+    parts.append('</ul></nav></header>')
+    return ''.join(parts)
+
+
+def tauste_product(index, seed=0):
+    """Dados do produto `index` da categoria: (sku, título, marca, preço em centavos, url)
+    
+    Depende só de (index, seed): o HTML e o JSON da API trazem o mesmo produto.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    sku = 100000 + index
+    brand = rng.choice(TAUSTE_BRANDS)
+    title = ' '.join(rng.choice(TAUSTE_WORDS) for _ in range(rng.randint(3, 6))) + f' {brand} {rng.choice([200, 400, 500, 750])}g'
+    cents = rng.randint(199, 19999)
+    url = f'https://tauste.com.br/sorocaba3/produto-{sku}.html'
+    return sku, title, brand, cents, url
+
+
+def format_brl(cents):
+    reais, cents = divmod(cents, 100)
+    return f"R$&nbsp;{reais:,}".replace(',', '.') + f",{cents:02d}"
+
+
+def tauste_listing_html(page=1, per_page=24, total=187, seed=0, chrome_size=320_000):
+    """Página de categoria do Magento (tema Luma) com toolbar e `li.product-item`"""
+    rng = random.Random(seed * 1000 + page)
+    first = (page - 1) * per_page
+    # Como o Magento, páginas além da última repetem a última
+    last_page = max(1, -(-total // per_page))
+    if page > last_page:
+        return tauste_listing_html(last_page, per_page, total, seed, chrome_size)
+    count = max(0, min(per_page, total - first))
+    
+    toolbar = (
+        '<div class="toolbar toolbar-products" data-mage-init=\'{"productListToolbarForm":{}}\'>'
+        '<p class="toolbar-amount" id="toolbar-amount">Itens '
+        f'<span class="toolbar-number">{first + 1}</span>-'
+        f'<span class="toolbar-number">{first + count}</span> de '
+        f'<span class="toolbar-number">{total}</span></p>'
+        '<div class="field limiter"><label class="label" for="limiter"><span>Mostrar</span></label>'
+        '<div class="control"><select id="limiter" data-role="limiter" class="limiter-options">'
+        + ''.join(
+            f'<option value="{n}"{SELECTED if n == per_page else ""}>{n}</option>'
+            for n in (12, 24, 36)
+        )
+        + '</select></div></div></div>'
+    )
+    
+    products = []
+    for index in range(first, first + count):
+        sku, title, brand, cents, url = tauste_product(index, seed)
+        products.append(
+            '<li class="item product product-item">'
+            '<div class="product-item-info" data-container="product-grid">'
+            f'<a href="{url}" class="product photo product-item-photo" tabindex="-1">'
+            '<span class="product-image-container"><span class="product-image-wrapper">'
+            f'<img class="product-image-photo" src="https://tauste.com.br/media/catalog/product/cache/1/{sku}.jpg"'
+            f' loading="lazy" width="240" height="300" alt="{title}"/></span></span></a>'
+            '<div class="product details product-item-details">'
+            f'<div class="product-brand">{brand}</div>'
+            f'<strong class="product name product-item-name"><a class="product-item-link" href="{url}">{title}</a></strong>'
+            f'<div class="price-box price-final_price" data-role="priceBox" data-product-id="{sku}">'
+            '<span class="price-container price-final_price tax weee">'
+            f'<span id="product-price-{sku}" data-price-amount="{cents / 100}" data-price-type="finalPrice" class="price-wrapper ">'
+            f'<span class="price">{format_brl(cents)}</span></span></span></div>'
+            '<div class="product-item-inner"><div class="product actions product-item-actions">'
+            f'<form data-role="tocart-form" data-product-sku="{sku}" action="https://tauste.com.br/checkout/cart/add/product/{sku}/" method="post">'
+            '<button type="submit" title="Adicionar" class="action tocart primary"><span>Adicionar</span></button>'
+            '</form></div></div></div></div></li>'
+        )
+    
+    return (
+        '<!doctype html><html lang="pt-BR"><head><meta charset="utf-8"/>'
+        '<title>Padaria - Tauste Supermercados</title></head>'
+        '<body class="page-products catalog-category-view">'
+        + _chrome(rng, chrome_size)
+        + '<main id="maincontent" class="page-main"><div class="columns"><div class="column main">'
+        + toolbar
+        + '<div class="products wrapper grid products-grid"><ol class="products list items product-items">'
+        + ''.join(products)
+        + '</ol></div>'
+        + toolbar
+        + '</div></div></main></body></html>'
+    )
+
+
+def tauste_page_url(page):
+    return TAUSTE_BASE_URL if page == 1 else f'{TAUSTE_BASE_URL}?p={page}'
+
+
+def tauste_graphql_category(path='padaria'):
+    """Resposta de `categoryList(filters: {url_path: ...})`"""
+    if path != 'padaria':
+        return {'data': {'categoryList': []}}
+    return {'data': {'categoryList': [{'uid': 'MTI=', 'name': 'Padaria'}]}}
+
+
+def tauste_graphql_products(current_page=1, page_size=20, total=187, seed=0):
+    """Resposta de `products(filter: {category_uid: ...})` no formato do Magento 2.4"""
+    total_pages = max(1, -(-total // page_size))
+    first = (current_page - 1) * page_size
+    items = []
+    for index in range(first, min(total, first + page_size)):
+        sku, title, brand, cents, url = tauste_product(index, seed)
+        items.append({
+            'sku': str(sku),
+            'name': title,
+            'url_key': f'produto-{sku}',
+            'url_suffix': '.html',
+            'small_image': {'url': f'https://tauste.com.br/media/catalog/product/cache/1/{sku}.jpg'},
+            'price_range': {'minimum_price': {'final_price': {'value': cents / 100}}},
+        })
+    return {'data': {'products': {
+        'total_count': total,
+        'page_info': {'current_page': current_page, 'page_size': page_size, 'total_pages': total_pages},
+        'items': items,
+    }}}
+
+
+ML_BASE_URL = 'https://lista.mercadolivre.com.br/tenis-corrida-masculino'
+ML_BRANDS = ['NIKE', 'ADIDAS', 'OLYMPIKUS', 'MIZUNO', 'ASICS', 'FILA', 'PUMA', 'MIZUNO', None]
+ML_WORDS = [
+    'Tênis', 'Corrida', 'Masculino', 'Caminhada', 'Academia', 'Leve', 'Confortável',
+    'Esportivo', 'Run', 'Speed', 'Racer', 'Amortecimento', 'Original', 'Promoção',
+]
+PLACEHOLDER_GIF = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+
+
+def ml_product(index, seed=0):
+    """Dados do anúncio `index` da busca: (id, título, marca, centavos, id da foto, link)"""
+    rng = random.Random(seed * 1_000_003 + index + 7)
+    listing_id = f'MLB{3_000_000_000 + index * 7919}'
+    brand = rng.choice(ML_BRANDS)
+    title = ' '.join(rng.choice(ML_WORDS) for _ in range(rng.randint(4, 8)))
+    cents = rng.randint(4990, 89990)
+    picture_id = f'{rng.randint(600000, 999999)}-MLB{rng.randint(10**10, 10**11 - 1)}_{rng.randint(1, 12):02d}2024'
+    slug = '-'.join(title.lower().split())
+    link = f'https://produto.mercadolivre.com.br/MLB-{listing_id[3:]}-{slug}-_JM'
+    return listing_id, title, brand, cents, picture_id, link
+
+
+def ml_card_html(index, seed=0, lazy=True):
+    """Um `div.poly-card` da listagem; com `lazy` o src é o GIF de placeholder"""
+    listing_id, title, brand, cents, picture_id, link = ml_product(index, seed)
+    image = f'https://http2.mlstatic.com/D_Q_NP_2X_{picture_id}-E.webp'
+    reais, centavos = divmod(cents, 100)
+    fraction = f'{reais:,}'.replace(',', '.')
+    brand_html = f'<span class="poly-component__brand">{brand}</span>' if brand else ''
+    return (
+        '<li class="ui-search-layout__item"><div class="poly-card poly-card--grid-card">'
+        '<div class="poly-card__portada"><img decoding="async" class="poly-component__picture"'
+        f' src="{PLACEHOLDER_GIF if lazy else image}" data-src="{image}" width="284" height="284" alt="{title}"/></div>'
+        '<div class="poly-card__content">'
+        + brand_html +
+        f'<h3 class="poly-component__title-wrapper"><a href="{link}" class="poly-component__title poly-component__link">'
+        f'<span class="poly-component__title-text">{title}</span></a></h3>'
+        '<div class="poly-component__reviews"><span class="poly-reviews__rating">4.8</span>'
+        '<span class="poly-reviews__total">(1234)</span></div>'
+        '<div class="poly-component__price"><div class="poly-price__current">'
+        f'<span class="andes-money-amount andes-money-amount--cents-superscript" role="img" aria-label="{reais} reais com {centavos} centavos">'
+        '<span class="andes-money-amount__currency-symbol">R$</span>'
+        f'<span class="andes-money-amount__fraction">{fraction}</span>'
+        + (f'<span class="andes-money-amount__decimal-separator">,</span><span class="andes-money-amount__cents">{centavos:02d}</span>' if centavos else '')
+        + '</span></div></div>'
+        '<div class="poly-component__shipping">Frete grátis</div>'
+        '</div></div></li>'
+    )
+
+
+def ml_state(page, per_page, total, seed=0, base_url=ML_BASE_URL):
+    """Estado `__PRELOADED_STATE__` com `results[].polycard` e `paging`"""
+    first = (page - 1) * per_page
+    results = []
+    for index in range(first, min(total, first + per_page)):
+        listing_id, title, brand, cents, picture_id, link = ml_product(index, seed)
+        components = [
+            {'type': 'title', 'title': {'text': title}},
+            {'type': 'price', 'price': {'current_price': {'value': cents / 100, 'currency': 'BRL'}}},
+        ]
+        if brand:
+            components.append({'type': 'brand', 'brand': {'text': brand}})
+        results.append({'polycard': {
+            'metadata': {'id': listing_id, 'url': link},
+            'pictures': {'pictures': [{'id': picture_id}]},
+            'components': components,
+        }})
+    next_offset = first + per_page + 1
+    next_page = (
+        {'url': f'{base_url}_Desde_{next_offset}_NoIndex_True'} if first + per_page < total else {}
+    )
+    return {'pageState': {'initialState': {
+        'results': results,
+        'paging': {'total': total, 'offset': first, 'limit': per_page},
+        'pagination': {'next_page': next_page},
+    }}}
+
+
+def ml_listing_html(page=1, per_page=48, total=2000, seed=0, lazy_after=4, chrome_size=250_000,
+                    base_url=ML_BASE_URL):
+    """Página de busca do MercadoLivre com cards `poly-card` e o estado JSON embutido"""
+    import json
+    
+    rng = random.Random(seed * 1000 + page + 99)
+    first = (page - 1) * per_page
+    cards = ''.join(
+        ml_card_html(index, seed, lazy=index - first >= lazy_after)
+        for index in range(first, min(total, first + per_page))
+    )
+    state = json.dumps(ml_state(page, per_page, total, seed, base_url), ensure_ascii=False)
+    last_page = max(1, -(-total // per_page))
+    pagination = ''
+    if page < last_page:
+        pagination = (
+            '<ul class="andes-pagination"><li class="andes-pagination__button andes-pagination__button--next">'
+            f'<a href="{base_url}_Desde_{first + per_page + 1}_NoIndex_True" class="andes-pagination__link"'
+            ' title="Seguinte"><span class="andes-pagination__arrow-title">Seguinte</span></a></li></ul>'
+        )
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"/>'
+        '<title>Tenis Corrida Masculino | MercadoLivre</title></head><body>'
+        + _chrome(rng, chrome_size)
+        + '<main id="root-app"><section class="ui-search-results"><ol class="ui-search-layout ui-search-layout--grid">'
+        + cards
+        + '</ol>' + pagination + '</section></main>'
+        + f'<script id="__PRELOADED_STATE__" type="application/json">{state}</script>'
+        + '</body></html>'
+    )
+
+
+def ml_page_url(page, per_page=48, base_url=ML_BASE_URL):
+    return base_url if page == 1 else f'{base_url}_Desde_{(page - 1) * per_page + 1}_NoIndex_True'
+
+
+def ml_pdp_html(index, seed=0, chrome_size=150_000):
+    """Página de produto (PDP) do anúncio `index`, com a galeria de fotos"""
+    rng = random.Random(seed * 1000 + index + 5)
+    listing_id, title, brand, cents, picture_id, link = ml_product(index, seed)
+    image = f'https://http2.mlstatic.com/D_NQ_NP_{picture_id}-O.webp'
+    figures = ''.join(
+        '<figure class="ui-pdp-gallery__figure">'
+        f'<img class="ui-pdp-image ui-pdp-gallery__figure__image" src="{image if n == 0 else PLACEHOLDER_GIF}"'
+        f' data-zoom="{image}" width="500" height="500" alt="{title}"/></figure>'
+        for n in range(6)
+    )
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"/>'
+        f'<title>{title} | MercadoLivre</title></head><body>'
+        + _chrome(rng, chrome_size)
+        + '<main id="root-app"><div class="ui-pdp-container">'
+        f'<div class="ui-pdp-gallery"><div class="ui-pdp-gallery__column">{figures}</div></div>'
+        f'<h1 class="ui-pdp-title">{title}</h1>'
+        f'<span class="andes-money-amount__fraction">{cents // 100}</span>'
+        '</div></main></body></html>'
+    )
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks offline dos parsers dos spiders
+
+Alimenta os callbacks com páginas sintéticas de `fixtures` como HtmlResponse
+(sem rede, sem engine) e mede, por caso:
+
+    µs/página   menor tempo de uma passada pelo corpus (inclui o parse do HTML,
+                sem coletas do GC durante a passada)
+    itens/s     itens produzidos por segundo nessa passada
+    pico KB     pico de memória alocada numa passada (tracemalloc)
+
+Os resultados são comparados com benchmarks/baselines.json; um caso mais
+lento (ou com pico de memória maior) que a baseline além do limite
+relativo *e* da piora absoluta mínima é marcado como regressão e o script
+sai com código 1. O mínimo absoluto evita que o ruído de casos de poucos
+µs (ex.: get_next_page) derrube a comparação numa árvore inalterada, e um
+caso só é dado como regressão se continuar pior numa segunda medição.
+
+Uso:
+    python benchmarks/run.py                  # compara com a baseline
+    python benchmarks/run.py --update         # grava a baseline atual
+    python benchmarks/run.py -k mercadolivre --threshold 0.3 --min-delta-us 10
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from itemadapter import ItemAdapter
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.settings.default_settings import TWISTED_REACTOR
+from scrapy.utils.reactor import install_reactor, is_reactor_installed
+from scrapy.utils.test import get_crawler
+
+import fixtures
+from coleta.items import ColetaItem
+from coleta.spiders.mercadolivre import MercadolivreSpider
+from coleta.spiders.tauste import TausteSpider
+
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+SETTINGS = {
+    'PRODUCT_IMAGE_CACHE_PATH': '',  # sem SQLite: só o custo do parse
+    'IMAGES_ML_VARIANT': 'listing',
+    'LOG_LEVEL': 'WARNING',
+}
+
+
+def create_spider(spidercls, **kwargs):
+    # get_crawler confere as settings contra o reactor instalado (Scrapy 2.13+);
+    # o reactor não chega a rodar, os callbacks são chamados direto
+    if not is_reactor_installed():
+        install_reactor(TWISTED_REACTOR)
+    crawler = get_crawler(spidercls, SETTINGS)
+    return crawler._create_spider(**kwargs)
+
+
+def page(url, body, **meta):
+    """(url, corpo, meta): o HtmlResponse é recriado a cada passada"""
+    return url, body, meta
+
+
+def build_responses(pages):
+    return [
+        HtmlResponse(url, body=body, encoding='utf-8', request=Request(url, meta=dict(meta)))
+        for url, body, meta in pages
+    ]
+
+
+class Case:
+    """Um callback aplicado a um corpus de páginas"""
+    
+    def __init__(self, name, callback, pages, before_pass=None):
+        self.name = name
+        self.callback = callback
+        self.pages = pages
+        self.before_pass = before_pass
+    
+    def run_pass(self):
+        if self.before_pass:
+            self.before_pass()
+        responses = build_responses(self.pages)
+        items = 0
+        # Como no timeit: sem coletas do GC no meio da medição
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for response in responses:
+                result = self.callback(response)
+                if result is None or isinstance(result, str):
+                    continue
+                for output in result:
+                    if ItemAdapter.is_item(output):
+                        items += 1
+            return time.perf_counter() - start, items
+        finally:
+            if gc_enabled:
+                gc.enable()
+    
+    def measure(self, repeat):
+        best, items = min(self.run_pass() for _ in range(repeat))
+        tracemalloc.start()
+        self.run_pass()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'us_per_page': round(best / len(self.pages) * 1e6, 1),
+            'items_per_sec': round(items / best, 1) if items else 0,
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+
+def tauste_cases():
+    synthetic = [
+        page(fixtures.tauste_page_url(n), fixtures.tauste_listing_html(page=n).encode('utf-8'),
+             page=n, fanout=n > 1)
+        for n in (1, 2, 3)
+    ]
+    spider = create_spider(TausteSpider)
+    reset = spider.page_signatures.clear
+    yield Case('tauste.parse/sinteticas', spider.parse, synthetic, reset)
+    yield Case('tauste.get_next_page', spider.get_next_page, synthetic)
+
+
+def mercadolivre_cases():
+    listing = [
+        page(fixtures.ml_page_url(n), fixtures.ml_listing_html(page=n).encode('utf-8'), page=n)
+        for n in (1, 2, 3)
+    ]
+    for extraction in ('css', 'json'):
+        spider = create_spider(MercadolivreSpider, extraction=extraction)
+        yield Case(f'mercadolivre.parse/{extraction}', spider.parse, listing)
+    
+    spider = create_spider(MercadolivreSpider)
+    yield Case('mercadolivre.get_next_page', spider.get_next_page, listing)
+    
+    pdp = []
+    for index in range(6):
+        _, title, _, _, _, link = fixtures.ml_product(index)
+        pdp.append(page(link, fixtures.ml_pdp_html(index).encode('utf-8'), item=ColetaItem(title=title, link=link)))
+    yield Case('mercadolivre.parse_product_image', spider.parse_product_image, pdp)
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def regressions(result, baseline, threshold, min_delta):
+    """Métricas piores que a baseline além do limite (tempo e pico de memória)
+    
+    `min_delta` mapeia cada métrica para a piora absoluta mínima: a métrica
+    só regride se passar do limite relativo e também desse mínimo.
+    """
+    found = []
+    for metric in ('us_per_page', 'peak_kb'):
+        old, new = baseline.get(metric), result[metric]
+        if old and new > old * (1 + threshold) and new - old > min_delta[metric]:
+            found.append(f"{metric} {old} -> {new}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='keyword', help='roda só os casos cujo nome contém o texto')
+    parser.add_argument('--repeat', type=int, default=20, help='passadas por caso (vale a melhor)')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='piora relativa tolerada antes de acusar regressão (0.2 = 20%%)')
+    parser.add_argument('--min-delta-us', type=float, default=5.0,
+                        help='piora absoluta mínima em µs/página para acusar regressão')
+    parser.add_argument('--min-delta-kb', type=float, default=16.0,
+                        help='piora absoluta mínima no pico de memória (KB)')
+    parser.add_argument('--update', action='store_true', help='grava os resultados como nova baseline')
+    args = parser.parse_args()
+    min_delta = {'us_per_page': args.min_delta_us, 'peak_kb': args.min_delta_kb}
+    
+    baselines = load_baselines()
+    results = {}
+    failed = False
+    print(f"{'caso':<36} {'µs/página':>11} {'itens/s':>10} {'pico KB':>9}  baseline")
+    for case in (*tauste_cases(), *mercadolivre_cases()):
+        if args.keyword and args.keyword not in case.name:
+            continue
+        result = case.measure(args.repeat)
+        results[case.name] = result
+        baseline = baselines.get(case.name)
+        if baseline is None:
+            status = 'sem baseline'
+        else:
+            found = regressions(result, baseline, args.threshold, min_delta)
+            if found:
+                # Confirma medindo de novo: um trecho lento da máquina não é regressão
+                retry = case.measure(args.repeat)
+                result = results[case.name] = {
+                    'us_per_page': min(result['us_per_page'], retry['us_per_page']),
+                    'items_per_sec': max(result['items_per_sec'], retry['items_per_sec']),
+                    'peak_kb': min(result['peak_kb'], retry['peak_kb']),
+                }
+                found = regressions(result, baseline, args.threshold, min_delta)
+            failed = failed or bool(found)
+            status = f"REGRESSÃO: {'; '.join(found)}" if found else 'ok'
+        print(
+            f"{case.name:<36} {result['us_per_page']:>11.1f} {result['items_per_sec']:>10.1f} "
+            f"{result['peak_kb']:>9.1f}  {status}"
+        )
+    
+    if args.update:
+        baselines.update(results)
+        with open(BASELINES, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline gravada em {BASELINES}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Servidor HTTP local que faz o papel das lojas nos testes e benchmarks
+
+Serve as páginas e respostas JSON de `fixtures` nas mesmas rotas do site
+real, contando requests e bytes por rota:
+
+    with StandInServer() as server:
+        server.url('/sorocaba3/padaria.html')   # http://127.0.0.1:<porta>/...
+        server.hits['tauste/graphql'], server.bytes_sent['tauste/html']
+
+Os hosts das lojas nos corpos (links de produto, próxima página, imagens)
+são reescritos para o próprio servidor, então um `scrapy crawl` apontado
+para ele nunca sai da máquina:
+
+    https://lista.mercadolivre.com.br   -> /ml/lista
+    https://produto.mercadolivre.com.br -> /ml/produto
+    https://http2.mlstatic.com          -> /ml/img
+    https://tauste.com.br               -> /
+
+Rotas do MercadoLivre:
+    /ml/lista/<busca>[_Desde_N_NoIndex_True]  listagem com cards `poly-card`
+    /ml/produto/MLB-<id>-<slug>-_JM           página do produto (PDP)
+    /ml/img/<foto>.webp                       imagem (ETag/304)
+
+Rotas do Tauste:
+    /<loja>/<categoria>.html[?p=N]   página de categoria do Magento
+    /graphql?query=...&variables=... API GraphQL (desligável com graphql=False)
+    /media/...                       imagem (ETag/304)
+
+Latência e bloqueios são configuráveis para medir o crawl de ponta a ponta:
+
+    latency='fixed:50'          50 ms em todo request
+    latency='uniform:20:200'    entre 20 e 200 ms
+    latency='lognormal:80:0.5'  mediana de 80 ms, sigma 0.5
+    throttle='50:5'             a cada 50 páginas servidas, 5 respostas 429
+                                (com Retry-After); imagens não são bloqueadas
+"""
+
+import functools
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import fixtures
+
+
+HOSTS = (
+    ('https://lista.mercadolivre.com.br', '/ml/lista'),
+    ('https://produto.mercadolivre.com.br', '/ml/produto'),
+    ('https://http2.mlstatic.com', '/ml/img'),
+    ('https://tauste.com.br', ''),
+)
+ML_LISTING = re.compile(r'^/ml/lista/([\w-]+?)(?:_Desde_(\d+))?(?:_NoIndex_True)?$')
+ML_PRODUCT = re.compile(r'^/ml/produto/MLB-?(\d+)')
+# IDs de anúncio gerados por fixtures.ml_product
+ML_FIRST_ID = 3_000_000_000
+ML_ID_STEP = 7919
+IMAGE_SIZE = 12_000
+
+
+class Latency:
+    """Distribuição de latência a partir de 'fixed:ms', 'uniform:min:max' ou 'lognormal:mediana:sigma'"""
+
+    def __init__(self, spec=None, seed=0):
+        self.spec = spec or 'fixed:0'
+        kind, *args = self.spec.split(':')
+        args = [float(arg) for arg in args]
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        if kind == 'fixed':
+            self._sample = lambda: args[0]
+        elif kind == 'uniform':
+            self._sample = lambda: self.rng.uniform(args[0], args[1])
+        elif kind == 'lognormal':
+            self._sample = lambda: self.rng.lognormvariate(math.log(args[0]), args[1])
+        else:
+            raise ValueError(f'Distribuição de latência desconhecida: {self.spec!r}')
+
+    def sample(self):
+        """Próxima latência, em segundos"""
+        with self._lock:
+            return self._sample() / 1000
+
+    def __repr__(self):
+        return f'Latency({self.spec!r})'
+
+
+class StandInServer:
+    def __init__(self, total=187, per_page=24, graphql=True, seed=0,
+                 ml_total=2000, ml_per_page=48, latency=None, throttle=None):
+        self.total = total
+        self.per_page = per_page
+        self.graphql = graphql
+        self.seed = seed
+        self.ml_total = ml_total
+        self.ml_per_page = ml_per_page
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency, seed)
+        # throttle='N:M': depois de N páginas servidas, M respostas 429
+        self.throttle = tuple(int(n) for n in throttle.split(':')) if throttle else None
+        self.hits = Counter()
+        self.bytes_sent = Counter()
+        self.statuses = Counter()  # '<rota>/<status>' -> respostas
+        self.first_request = None
+        self.last_response = None
+        self._page_requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._base = ''
+        # Páginas são determinísticas: as mais recentes ficam prontas
+        self.render = functools.lru_cache(maxsize=256)(self._render)
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._base = self.url('')
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path='/'):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{path}'
+
+    @property
+    def elapsed(self):
+        """Segundos entre o primeiro request e a última resposta"""
+        if self.first_request is None:
+            return 0.0
+        return self.last_response - self.first_request
+
+    def route(self, method, path, query, headers):
+        """(nome da rota, status, content-type, corpo, headers extras) de um request"""
+        if path.startswith(('/ml/img/', '/media/')):
+            return self.image(path, headers)
+        name, status, content_type, body, extra = self.page(path, query, headers)
+        if status == 200 and self.throttled():
+            return name, 429, 'text/plain', b'too many requests', {'Retry-After': '1'}
+        return name, status, content_type, body, extra
+
+    def page(self, path, query, headers):
+        listing = ML_LISTING.match(path)
+        if listing:
+            return self.ml_listing(listing.group(1), int(listing.group(2) or 1))
+        product = ML_PRODUCT.match(path)
+        if product:
+            return self.ml_product(int(product.group(1)))
+        if path == '/graphql':
+            return self.tauste_graphql(query, headers)
+        if path.endswith('.html'):
+            page = int((query.get('p') or ['1'])[0])
+            body = self.render('tauste/html', page)
+            return 'tauste/html', 200, 'text/html; charset=utf-8', body, {}
+        return 'not_found', 404, 'text/plain', b'not found', {}
+
+    def throttled(self):
+        """Conta uma página servida e diz se ela cai numa rajada de 429"""
+        if not self.throttle:
+            return False
+        every, length = self.throttle
+        with self._lock:
+            position = self._page_requests % (every + length)
+            self._page_requests += 1
+        return position >= every
+
+    def ml_listing(self, slug, offset):
+        page = (offset - 1) // self.ml_per_page + 1
+        if (page - 1) * self.ml_per_page >= self.ml_total:
+            return 'ml/lista', 404, 'text/plain', b'not found', {}
+        body = self.render('ml/lista', page, slug)
+        return 'ml/lista', 200, 'text/html; charset=utf-8', body, {}
+
+    def ml_product(self, numeric_id):
+        index, rest = divmod(numeric_id - ML_FIRST_ID, ML_ID_STEP)
+        if rest or not 0 <= index < self.ml_total:
+            return 'ml/produto', 404, 'text/plain', b'not found', {}
+        body = self.render('ml/produto', index)
+        return 'ml/produto', 200, 'text/html; charset=utf-8', body, {}
+
+    def image(self, path, headers):
+        name = 'ml/img' if path.startswith('/ml/') else 'tauste/img'
+        etag = '"%s"' % hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+        if headers.get('If-None-Match') == etag:
+            return name, 304, 'image/webp', b'', {'ETag': etag}
+        return name, 200, 'image/webp', self.render('img', path), {'ETag': etag}
+
+    def tauste_graphql(self, query, headers):
+        if not self.graphql:
+            return 'tauste/graphql', 404, 'text/plain', b'not found', {}
+        text = (query.get('query') or [''])[0]
+        variables = json.loads((query.get('variables') or ['{}'])[0])
+        if not headers.get('Store'):
+            payload = {'errors': [{'message': 'Store header missing'}]}
+        elif 'categoryList' in text:
+            payload = fixtures.tauste_graphql_category(variables.get('path'))
+        elif 'products' in text:
+            payload = fixtures.tauste_graphql_products(
+                variables.get('currentPage', 1), variables.get('pageSize', 20), self.total, self.seed
+            )
+        else:
+            payload = {'errors': [{'message': 'Unsupported query'}]}
+        body = self.rewrite_hosts(json.dumps(payload, ensure_ascii=False)).encode('utf-8')
+        return 'tauste/graphql', 200, 'application/json', body, {}
+
+    def _render(self, kind, *args):
+        """Corpo de uma página (com os hosts reescritos); cacheado por `render`"""
+        if kind == 'img':
+            # Cabeçalho RIFF/WEBP e bytes estáveis por URL
+            digest = hashlib.sha256(args[0].encode('utf-8')).digest()
+            payload = b'VP8 ' + (digest * (IMAGE_SIZE // len(digest)))
+            return b'RIFF' + (len(payload) + 4).to_bytes(4, 'little') + b'WEBP' + payload
+        if kind == 'ml/lista':
+            page, slug = args
+            text = fixtures.ml_listing_html(
+                page, self.ml_per_page, self.ml_total, self.seed,
+                base_url=f'{HOSTS[0][0]}/{slug}',
+            )
+        elif kind == 'ml/produto':
+            text = fixtures.ml_pdp_html(args[0], self.seed)
+        else:
+            text = fixtures.tauste_listing_html(args[0], self.per_page, self.total, self.seed)
+        return self.rewrite_hosts(text).encode('utf-8')
+
+    def rewrite_hosts(self, text):
+        for host, prefix in HOSTS:
+            text = text.replace(host, self._base + prefix)
+        return text
+
+    def _record(self, name, status, size, started):
+        with self._lock:
+            self.hits[name] += 1
+            self.bytes_sent[name] += size
+            self.statuses[f'{name}/{status}'] += 1
+            if self.first_request is None or started < self.first_request:
+                self.first_request = started
+            self.last_response = time.monotonic()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                started = time.monotonic()
+                parts = urlsplit(self.path)
+                name, status, content_type, body, headers = server.route(
+                    'GET', parts.path, parse_qs(parts.query), self.headers
+                )
+                delay = server.latency.sample()
+                if delay > 0:
+                    time.sleep(delay)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._record(name, status, len(body), started)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,37 @@
+"""
+Add-ons do projeto (ver ADDONS em settings.py)
+"""
+
+import os
+
+
+# Extensão do arquivo -> formato do feed
+FEED_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jl': 'jsonlines',
+    '.jsonl': 'jsonlines',
+    '.xml': 'xml',
+}
+
+
+class IncrementalAddon:
+    """Registra o feed delta do modo incremental
+    
+    Com INCREMENTAL_ENABLED e INCREMENTAL_DELTA_FEED definidos, adiciona a
+    FEEDS um feed filtrado por DeltaItemFilter, sem substituir os feeds
+    passados com -o (o snapshot completo).
+    """
+    
+    def update_settings(self, settings):
+        if not settings.getbool('INCREMENTAL_ENABLED'):
+            return
+        uri = settings.get('INCREMENTAL_DELTA_FEED')
+        if not uri:
+            return
+        
+        extension = os.path.splitext(uri.split('?', 1)[0])[1].lower()
+        settings['FEEDS'].set(uri, {
+            'format': FEED_FORMATS.get(extension, 'jsonlines'),
+            'item_filter': 'coleta.feeds.DeltaItemFilter',
+        }, priority='addon')
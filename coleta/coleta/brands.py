@@ -0,0 +1,83 @@
+"""
+Reconhecimento de marcas em títulos de produto
+
+As marcas vêm de um dicionário (coleta/data/brands.txt, uma por linha) e
+são compiladas uma vez em um autômato de Aho-Corasick: cada título é
+percorrido uma única vez, qualquer que seja o tamanho do dicionário.
+"""
+
+import pkgutil
+from collections import deque
+from functools import lru_cache
+
+
+class BrandMatcher:
+    """Encontra a primeira marca do dicionário que aparece como palavra inteira no texto"""
+    
+    def __init__(self, brands):
+        self.goto = [{}]     # estado -> {caractere: próximo estado}
+        self.fail = [0]
+        self.output = [()]   # estado -> ((comprimento, marca), ...) que terminam nele
+        for brand in brands:
+            self._add(brand)
+        self._build_failure_links()
+    
+    @classmethod
+    def from_file(cls, package='coleta', resource='data/brands.txt'):
+        data = pkgutil.get_data(package, resource).decode('utf-8')
+        return cls(
+            line.strip() for line in data.splitlines()
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+    
+    def _add(self, brand):
+        state = 0
+        for char in brand.lower():
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] += ((len(brand), brand),)
+    
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+    
+    def find(self, text):
+        """Marca que começa mais à esquerda (a mais longa em empate), ou None"""
+        if not text:
+            return None
+        text = text.lower()
+        best = None  # (início, -comprimento, marca)
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, brand in self.output[state]:
+                start = end - length
+                # Só palavras inteiras: "Norton" não casa dentro de "Nortonia"
+                if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                    continue
+                candidate = (start, -length, brand)
+                if best is None or candidate < best:
+                    best = candidate
+        return best[2] if best else None
+
+
+@lru_cache(maxsize=None)
+def default_matcher():
+    """BrandMatcher do dicionário do projeto, carregado uma única vez"""
+    return BrandMatcher.from_file()
@@ -0,0 +1,24 @@
+"""
+Utilitários compartilhados pelos armazenamentos SQLite do projeto
+"""
+
+import os
+import sqlite3
+
+
+def connect(path, readonly=False):
+    """Abre (ou cria) um banco SQLite com as pragmas usadas pelo projeto
+
+    O modo WAL permite leitura enquanto o crawl grava; `readonly` abre o
+    arquivo existente sem permitir escrita (replay offline).
+    """
+    if readonly:
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+    return db
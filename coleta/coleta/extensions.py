@@ -0,0 +1,371 @@
+"""
+Extensões do projeto (ver EXTENSIONS em settings.py)
+"""
+
+import cProfile
+import functools
+import heapq
+import inspect
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from itertools import count
+from time import perf_counter, thread_time
+
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.http import Response
+
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores (ms) dos buckets dos histogramas de tempo
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Métodos do spider que não fazem parte do processamento das páginas
+UNPROFILED_METHODS = {'start', 'start_requests', 'closed'}
+UNSAFE_FILENAME = re.compile(r'[^\w.-]+')
+
+
+def histogram_labels():
+    return [f'le_{limit}ms' for limit in HISTOGRAM_BUCKETS_MS] + [f'gt_{HISTOGRAM_BUCKETS_MS[-1]}ms']
+
+
+def profile_pipeline(crawler, pipeline):
+    """Devolve `pipeline` com o process_item cronometrado pelo ProfilingExtension
+
+    Chamado no from_crawler dos pipelines do projeto, antes de o
+    ItemPipelineManager registrar o método. O wrapper mantém a assinatura
+    original, então o Scrapy continua decidindo sozinho se passa o `spider`.
+    Sem o extension ativo, o pipeline volta intacto.
+    """
+    try:
+        extensions = crawler.extensions.middlewares
+    except (AttributeError, RuntimeError):
+        return pipeline  # crawler de teste, sem extensions
+    for extension in extensions:
+        if isinstance(extension, ProfilingExtension):
+            pipeline.process_item = extension.wrap(
+                f'pipeline/{type(pipeline).__name__}', pipeline.process_item
+            )
+    return pipeline
+
+
+def bucket_index(seconds):
+    ms = seconds * 1000
+    for index, limit in enumerate(HISTOGRAM_BUCKETS_MS):
+        if ms <= limit:
+            return index
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+class CallProfile:
+    """Tempos e contadores acumulados de um callback ou estágio de pipeline"""
+
+    __slots__ = (
+        'calls', 'wall', 'cpu', 'max_wall', 'items', 'requests', 'response_bytes',
+        'dropped', 'errors', 'wall_histogram', 'cpu_histogram',
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+        self.items = 0
+        self.requests = 0
+        self.response_bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.wall_histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.cpu_histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, wall, cpu=None):
+        """Registra uma chamada; `cpu` é None para corrotinas (o tempo de CPU
+        entre dois awaits é de quem estiver rodando no reactor)"""
+        self.calls += 1
+        self.wall += wall
+        self.max_wall = max(self.max_wall, wall)
+        self.wall_histogram[bucket_index(wall)] += 1
+        if cpu is not None:
+            self.cpu += cpu
+            self.cpu_histogram[bucket_index(cpu)] += 1
+
+    def count_output(self, output):
+        if isinstance(output, scrapy.Request):
+            self.requests += 1
+        else:
+            self.items += 1
+
+    def as_dict(self):
+        labels = histogram_labels()
+        data = {
+            'calls': self.calls,
+            'wall_ms': round(self.wall * 1000, 3),
+            'cpu_ms': round(self.cpu * 1000, 3),
+            'mean_wall_ms': round(self.wall * 1000 / self.calls, 3) if self.calls else 0.0,
+            'max_wall_ms': round(self.max_wall * 1000, 3),
+            'items': self.items,
+            'requests': self.requests,
+            'response_bytes': self.response_bytes,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'wall_histogram': dict(zip(labels, self.wall_histogram)),
+        }
+        if any(self.cpu_histogram):
+            data['cpu_histogram'] = dict(zip(labels, self.cpu_histogram))
+        return data
+
+
+class ProfilingExtension:
+    """Tempo de cada callback do spider e de cada estágio dos pipelines
+
+    Com PROFILING_ENABLED, envolve os métodos públicos do spider (ou os de
+    PROFILING_SPIDER_METHODS) e o process_item de cada pipeline do projeto
+    (ver profile_pipeline) e registra, por nome: chamadas, tempo de parede
+    e de CPU (total, máximo e histograma), itens e requests gerados e bytes
+    das respostas. Os tempos
+    são inclusivos: `parse` inclui o `get_next_page` chamado dentro dele.
+    Ao fechar o spider os números vão para as stats `profile/<nome>/*` e
+    para o relatório JSON em PROFILING_REPORT.
+
+    Com PROFILING_CPROFILE_TOP=N, cada página passa pelo cProfile e os dumps
+    das N mais lentas são gravados ao lado do relatório (abrir com
+    `python -m pstats` ou snakeviz).
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('PROFILING_ENABLED'):
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.report_uri = settings.get('PROFILING_REPORT')
+        self.spider_methods = settings.getlist('PROFILING_SPIDER_METHODS')
+        self.cprofile_top = settings.getint('PROFILING_CPROFILE_TOP', 0)
+        self.profiles = {}
+        self.slowest = []  # heap de (parede, seq, nome, url, cProfile.Profile)
+        self._sequence = count()
+        self._depth = 0  # chamadas perfiladas em andamento (tempos inclusivos)
+        self._started = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        self._started = datetime.now(tz=timezone.utc)
+        for name in self.spider_methods or self.public_methods(spider):
+            method = getattr(spider, name, None)
+            if callable(method):
+                # Requests criados depois daqui (callback=self.parse) já
+                # pegam o atributo da instância
+                setattr(spider, name, self.wrap(f'spider/{name}', method))
+
+    def public_methods(self, spider):
+        """Funções públicas definidas nas classes do spider (não no scrapy.Spider)"""
+        names = []
+        for cls in type(spider).__mro__:
+            if cls is scrapy.Spider:
+                break
+            for name, value in vars(cls).items():
+                if (inspect.isfunction(value) and not name.startswith('_')
+                        and name not in UNPROFILED_METHODS and name not in names):
+                    names.append(name)
+        return names
+
+    def wrap(self, name, func):
+        """Versão cronometrada de `func`, do mesmo tipo (função, gerador, corrotina)"""
+        profile = self.profiles.setdefault(name, CallProfile())
+
+        if inspect.isasyncgenfunction(func):
+            def wrapper(*args, **kwargs):
+                return self.timed_async_generator(profile, func(*args, **kwargs))
+        elif inspect.iscoroutinefunction(func):
+            async def wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except DropItem:
+                    profile.dropped += 1
+                    raise
+                except Exception:
+                    profile.errors += 1
+                    raise
+                finally:
+                    profile.add(perf_counter() - started)
+        elif inspect.isgeneratorfunction(func):
+            def wrapper(*args, **kwargs):
+                page = self.page_response(profile, args)
+                return self.timed_generator(name, profile, func(*args, **kwargs), page)
+        else:
+            def wrapper(*args, **kwargs):
+                page = self.page_response(profile, args)
+                cprofile = self.page_profiler(page)
+                self._depth += 1
+                if cprofile:
+                    cprofile.enable()
+                started, cpu_started = perf_counter(), thread_time()
+                try:
+                    return func(*args, **kwargs)
+                except DropItem:
+                    profile.dropped += 1
+                    raise
+                except Exception:
+                    profile.errors += 1
+                    raise
+                finally:
+                    wall = perf_counter() - started
+                    profile.add(wall, thread_time() - cpu_started)
+                    if cprofile:
+                        cprofile.disable()
+                    self._depth -= 1
+                    self.keep_if_slow(name, page, wall, cprofile)
+
+        # Mesma assinatura do original (inspect.signature segue __wrapped__)
+        return functools.wraps(func)(wrapper)
+
+    def timed_generator(self, name, profile, generator, page):
+        """Cronometra cada retomada do gerador do callback, não o tempo entre elas"""
+        wall = cpu = 0.0
+        cprofile = self.page_profiler(page)
+        try:
+            while True:
+                self._depth += 1
+                if cprofile:
+                    cprofile.enable()
+                started, cpu_started = perf_counter(), thread_time()
+                try:
+                    output = next(generator)
+                except StopIteration:
+                    return
+                except Exception:
+                    profile.errors += 1
+                    raise
+                finally:
+                    wall += perf_counter() - started
+                    cpu += thread_time() - cpu_started
+                    if cprofile:
+                        cprofile.disable()
+                    self._depth -= 1
+                profile.count_output(output)
+                yield output
+        finally:
+            generator.close()
+            profile.add(wall, cpu)
+            self.keep_if_slow(name, page, wall, cprofile)
+
+    async def timed_async_generator(self, profile, generator):
+        wall = 0.0
+        try:
+            while True:
+                started = perf_counter()
+                try:
+                    output = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception:
+                    profile.errors += 1
+                    raise
+                finally:
+                    wall += perf_counter() - started
+                profile.count_output(output)
+                yield output
+        finally:
+            await generator.aclose()
+            profile.add(wall)
+
+    def page_response(self, profile, args):
+        """A resposta recebida por um callback chamado pelo Scrapy (None para auxiliares)"""
+        if self._depth or not args or not isinstance(args[0], Response):
+            return None
+        profile.response_bytes += len(args[0].body)
+        return args[0]
+
+    def page_profiler(self, page):
+        if page is None or not self.cprofile_top:
+            return None
+        return cProfile.Profile()
+
+    def keep_if_slow(self, name, page, wall, cprofile):
+        """Mantém os cProfile das PROFILING_CPROFILE_TOP páginas mais lentas"""
+        if cprofile is None:
+            return
+        entry = (wall, next(self._sequence), name, page.url, cprofile)
+        if len(self.slowest) < self.cprofile_top:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def spider_closed(self, spider, reason):
+        for name, profile in self.profiles.items():
+            if not profile.calls:
+                continue
+            data = profile.as_dict()
+            for key in ('calls', 'wall_ms', 'cpu_ms', 'max_wall_ms', 'items', 'requests',
+                        'response_bytes', 'dropped', 'errors'):
+                if data[key]:
+                    self.stats.set_value(f'profile/{name}/{key}', data[key])
+            for label, calls in data['wall_histogram'].items():
+                if calls:
+                    self.stats.set_value(f'profile/{name}/wall_histogram/{label}', calls)
+
+        self.log_summary()
+        if self.report_uri:
+            path = self.write_report(spider, reason)
+            self.stats.set_value('profile/report', path)
+            logger.info(f"Relatório de profiling: {path}")
+
+    def log_summary(self, limit=10):
+        ranked = sorted(
+            ((name, profile) for name, profile in self.profiles.items() if profile.calls),
+            key=lambda entry: entry[1].wall,
+            reverse=True,
+        )
+        for name, profile in ranked[:limit]:
+            logger.info(
+                "%(name)-45s %(calls)7d chamadas | parede %(wall).1f ms | CPU %(cpu).1f ms | máx %(max).1f ms",
+                {
+                    'name': name, 'calls': profile.calls, 'wall': profile.wall * 1000,
+                    'cpu': profile.cpu * 1000, 'max': profile.max_wall * 1000,
+                },
+            )
+
+    def write_report(self, spider, reason):
+        path = self.report_uri % {
+            'name': spider.name,
+            'time': self._started.replace(microsecond=0).isoformat().replace(':', '-'),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        slowest = []
+        for rank, (wall, _, name, url, cprofile) in enumerate(sorted(self.slowest, reverse=True), 1):
+            dump = f"{os.path.splitext(path)[0]}_{rank:02d}_{UNSAFE_FILENAME.sub('_', name)}.prof"
+            cprofile.dump_stats(dump)
+            slowest.append({'callback': name, 'url': url, 'wall_ms': round(wall * 1000, 3), 'profile': dump})
+
+        report = {
+            'spider': spider.name,
+            'reason': reason,
+            'started': self._started.isoformat(),
+            'histogram_buckets_ms': list(HISTOGRAM_BUCKETS_MS),
+            'callbacks': {
+                name[len('spider/'):]: profile.as_dict()
+                for name, profile in self.profiles.items() if name.startswith('spider/') and profile.calls
+            },
+            'pipelines': {
+                name[len('pipeline/'):]: profile.as_dict()
+                for name, profile in self.profiles.items() if name.startswith('pipeline/')
+            },
+            'slowest_pages': slowest,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
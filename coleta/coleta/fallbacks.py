@@ -0,0 +1,46 @@
+"""
+Cadeias de seletores alternativos compiladas em um único XPath
+
+Em vez de tentar `element.css(a)`, `element.css(b)`, ... um de cada vez
+(cada tentativa cria um SelectorList e percorre o elemento de novo), a
+cadeia inteira vira uma expressão
+
+    concat(string((A)[1]), '␟', string((B)[1]), ...)
+
+avaliada uma única vez por elemento: o resultado traz o primeiro valor de
+cada seletor, na ordem da cadeia, e vale o primeiro aceito.
+"""
+
+from lxml import etree
+from parsel import css2xpath
+
+
+# Separador dos valores no resultado do concat (não aparece em páginas reais)
+SEPARATOR = '␟'
+
+
+def not_blank(value):
+    return bool(value.strip())
+
+
+class FallbackChain:
+    """Seletores CSS alternativos para um campo, em ordem de preferência"""
+    
+    def __init__(self, field, selectors, accept=not_blank):
+        self.field = field
+        self.selectors = tuple(selectors)
+        self.accept = accept
+        parts = [f'string(({css2xpath(css)})[1])' for css in self.selectors]
+        if len(parts) == 1:
+            expression = parts[0]
+        else:
+            expression = 'concat(' + f", '{SEPARATOR}', ".join(parts) + ')'
+        self.xpath = etree.XPath(expression)
+    
+    def __call__(self, element):
+        """(valor sem espaços nas pontas, seletor que o forneceu) ou (None, None)"""
+        root = getattr(element, 'root', element)  # Selector ou elemento lxml
+        for selector, value in zip(self.selectors, self.xpath(root).split(SEPARATOR)):
+            if self.accept(value):
+                return value.strip(), selector
+        return None, None
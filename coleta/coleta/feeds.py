@@ -0,0 +1,15 @@
+"""
+Filtros de feed do projeto
+"""
+
+from itemadapter import ItemAdapter
+from scrapy.extensions.feedexport import ItemFilter
+
+
+class DeltaItemFilter(ItemFilter):
+    """Aceita só itens novos ou alterados desde o último crawl (modo incremental)"""
+    
+    def accepts(self, item):
+        if not super().accepts(item):
+            return False
+        return ItemAdapter(item).get('crawl_status') in ('new', 'changed')
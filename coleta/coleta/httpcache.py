@@ -0,0 +1,148 @@
+"""
+Armazenamento do cache HTTP do Scrapy em um único arquivo SQLite
+
+Uso (settings.py ou -s):
+    HTTPCACHE_ENABLED = True
+    HTTPCACHE_STORAGE = "coleta.httpcache.SqliteCacheStorage"
+
+Para repetir um crawl offline a partir do cache:
+    -s HTTPCACHE_SQLITE_READONLY=True -s HTTPCACHE_IGNORE_MISSING=True
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import zlib
+from time import time
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+from coleta.db import connect
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    digest BLOB PRIMARY KEY,
+    data   BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint BLOB PRIMARY KEY,
+    url         TEXT NOT NULL,
+    status      INTEGER NOT NULL,
+    headers     BLOB NOT NULL,
+    body_digest BLOB NOT NULL REFERENCES bodies(digest),
+    stored_at   REAL NOT NULL
+);
+"""
+
+
+class SqliteCacheStorage:
+    """HTTPCACHE_STORAGE com respostas comprimidas em um arquivo SQLite por spider
+    
+    Headers e corpos são gravados com zlib; corpos idênticos (mesmo SHA-1)
+    são guardados uma única vez. As consultas são pela chave primária
+    (fingerprint do request), então o tempo de busca e o tamanho do índice
+    crescem devagar mesmo com dezenas de milhares de páginas. Com
+    HTTPCACHE_SQLITE_READONLY o arquivo é aberto só para leitura, sem
+    escritas nem locks de escrita, para replay offline.
+    """
+    
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.readonly = settings.getbool('HTTPCACHE_SQLITE_READONLY')
+        self.compression_level = settings.getint('HTTPCACHE_SQLITE_COMPRESSION_LEVEL', 6)
+        self.commit_every = settings.getint('HTTPCACHE_SQLITE_COMMIT_EVERY', 20)
+        self.db = None
+        self._pending = 0
+    
+    def open_spider(self, spider):
+        path = os.path.join(self.cachedir, f'{spider.name}.sqlite')
+        if self.readonly and not os.path.exists(path):
+            # mode=ro não cria o arquivo: sem cache gravado, nada a repetir
+            logger.error(
+                "HTTPCACHE_SQLITE_READONLY ativo, mas o cache %(cachepath)s não existe; "
+                "rode o crawl uma vez sem READONLY para gravá-lo. Nenhuma resposta "
+                "virá do cache",
+                {'cachepath': path},
+                extra={'spider': spider},
+            )
+            self.db = sqlite3.connect(':memory:', check_same_thread=False)
+            self.db.executescript(SCHEMA)
+        else:
+            self.db = connect(path, readonly=self.readonly)
+        # Leitura via mmap: o replay lê as páginas direto do page cache do SO
+        self.db.execute('PRAGMA mmap_size=268435456')
+        if not self.readonly:
+            self.db.executescript(SCHEMA)
+        
+        logger.debug(
+            "Using SQLite cache storage in %(cachepath)s",
+            {'cachepath': path},
+            extra={'spider': spider},
+        )
+        
+        assert spider.crawler.request_fingerprinter
+        self._fingerprinter = spider.crawler.request_fingerprinter
+    
+    def close_spider(self, spider):
+        if not self.readonly:
+            self.db.commit()
+            # Incorporar o WAL ao arquivo principal: o replay lê um único arquivo
+            self.db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.db.close()
+    
+    def retrieve_response(self, spider, request):
+        row = self.db.execute(
+            'SELECT r.url, r.status, r.headers, r.stored_at, b.data '
+            'FROM responses r JOIN bodies b ON b.digest = r.body_digest '
+            'WHERE r.fingerprint = ?',
+            (self._fingerprinter.fingerprint(request),),
+        ).fetchone()
+        if row is None:
+            return None  # not cached
+        
+        url, status, raw_headers, stored_at, data = row
+        if 0 < self.expiration_secs < time() - stored_at:
+            return None  # expired
+        
+        headers = Headers(headers_raw_to_dict(zlib.decompress(raw_headers)))
+        body = zlib.decompress(data)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+    
+    def store_response(self, spider, request, response):
+        if self.readonly:
+            return
+        
+        body = response.body
+        digest = hashlib.sha1(body).digest()
+        # Corpo já armazenado (outra URL, mesma página): nada a comprimir
+        if self.db.execute('SELECT 1 FROM bodies WHERE digest = ?', (digest,)).fetchone() is None:
+            self.db.execute(
+                'INSERT INTO bodies (digest, data) VALUES (?, ?)',
+                (digest, zlib.compress(body, self.compression_level)),
+            )
+        self.db.execute(
+            'INSERT OR REPLACE INTO responses '
+            '(fingerprint, url, status, headers, body_digest, stored_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                self._fingerprinter.fingerprint(request),
+                response.url,
+                response.status,
+                zlib.compress(headers_dict_to_raw(response.headers), self.compression_level),
+                digest,
+                time(),
+            ),
+        )
+        
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.db.commit()
+            self._pending = 0
@@ -0,0 +1,210 @@
+"""
+Armazenamento de imagens endereçado por conteúdo
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from coleta.db import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    path   TEXT NOT NULL,
+    size   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url           TEXT PRIMARY KEY,
+    digest        TEXT NOT NULL REFERENCES blobs(digest),
+    etag          TEXT,
+    last_modified TEXT,
+    checked_at    REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Entradas verificadas há menos que isso valem sem nenhum request (24 h)
+DEFAULT_REVALIDATE_AFTER = 24 * 3600
+
+# Assinaturas (magic bytes) dos formatos servidos pelas lojas
+MAGIC_EXTENSIONS = [
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+]
+
+
+def guess_extension(data, url=''):
+    """Descobre a extensão pelo conteúdo, usando a URL como último recurso"""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    for magic, extension in MAGIC_EXTENSIONS:
+        if data.startswith(magic):
+            return extension
+    
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension in ('.webp', '.jpg', '.jpeg', '.png', '.gif'):
+        return extension
+    return '.jpg'  # Padrão
+
+
+class ImageStore:
+    """Guarda imagens pelo digest SHA-256 dos bytes
+    
+    Os arquivos ficam em subdiretórios pelo prefixo do digest
+    (`ab/cd/abcd....webp`) e um índice SQLite mapeia cada URL de origem
+    para o digest. URLs repetidas custam uma consulta ao índice e imagens
+    idênticas vindas de URLs diferentes são gravadas uma única vez.
+    
+    O índice também guarda ETag/Last-Modified de cada URL. Entradas
+    verificadas há mais de `revalidate_after` segundos (e ainda não
+    verificadas nesta execução) são revalidadas com um request condicional;
+    um 304 conta como hit sem bytes de corpo. Os contadores de hit/miss e
+    bytes economizados ficam em `self.stats`.
+    """
+    
+    def __init__(self, root='images', index_name='index.sqlite',
+                 revalidate_after=DEFAULT_REVALIDATE_AFTER):
+        self.root = root
+        self.revalidate_after = revalidate_after
+        self.stats = Counter()
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._checked = set()  # URLs verificadas nesta execução
+        self._db = connect(os.path.join(self.root, index_name))
+        self._db.executescript(SCHEMA)
+    
+    def lookup(self, url):
+        """Retorna o caminho local já indexado para a URL, ou None"""
+        entry = self._live_entry(url)
+        if entry is None:
+            return None
+        return os.path.join(self.root, entry[0])
+    
+    def cached(self, url):
+        """Retorna o caminho se a entrada ainda está fresca (sem acesso à rede)"""
+        entry = self._live_entry(url)
+        if entry is None:
+            return None
+        path, size, _, _, checked_at = entry
+        if url not in self._checked and time.time() - checked_at >= self.revalidate_after:
+            return None
+        with self._lock:
+            self._count_hit(size)
+        return os.path.join(self.root, path)
+    
+    def conditional_headers(self, url):
+        """Headers If-None-Match/If-Modified-Since para revalidar a URL"""
+        entry = self._live_entry(url)
+        headers = {}
+        if entry is None:
+            return headers
+        _, _, etag, last_modified, _ = entry
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+    
+    def not_modified(self, url, etag=None, last_modified=None):
+        """Registra um 304: a cópia local continua válida; retorna o caminho"""
+        entry = self._live_entry(url)
+        if entry is None:
+            return None
+        path, size, old_etag, old_last_modified, _ = entry
+        with self._lock:
+            self._db.execute(
+                'UPDATE urls SET etag = ?, last_modified = ?, checked_at = ? WHERE url = ?',
+                (etag or old_etag, last_modified or old_last_modified, time.time(), url),
+            )
+            self._db.commit()
+            self._checked.add(url)
+            self.stats['revalidated'] += 1
+            self._count_hit(size)
+        return os.path.join(self.root, path)
+    
+    def put(self, url, data, etag=None, last_modified=None):
+        """Indexa a URL e grava os bytes, se ainda não existirem; retorna o caminho"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.stats['miss'] += 1
+            self.stats['bytes_downloaded'] += len(data)
+            row = self._db.execute('SELECT path FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                relpath = self._relpath(digest, guess_extension(data, url))
+                self._write(relpath, data)
+                self._db.execute(
+                    'INSERT INTO blobs (digest, path, size) VALUES (?, ?, ?)',
+                    (digest, relpath, len(data)),
+                )
+            else:
+                relpath = row[0]
+                if not os.path.exists(os.path.join(self.root, relpath)):
+                    self._write(relpath, data)
+            self._db.execute(
+                'INSERT OR REPLACE INTO urls (url, digest, etag, last_modified, checked_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, digest, etag, last_modified, time.time()),
+            )
+            self._db.commit()
+            self._checked.add(url)
+        return os.path.join(self.root, relpath)
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    def summary(self):
+        """Resumo legível dos contadores de cache"""
+        hits = self.stats['hit']
+        total = hits + self.stats['miss']
+        ratio = hits / total if total else 0.0
+        return (
+            f"{hits} hits ({self.stats['revalidated']} via 304), {self.stats['miss']} misses, "
+            f"taxa de acerto {ratio:.0%}, {self.stats['bytes_saved']} bytes economizados, "
+            f"{self.stats['bytes_downloaded']} bytes baixados"
+        )
+    
+    def _count_hit(self, size):
+        self.stats['hit'] += 1
+        self.stats['bytes_saved'] += size
+    
+    def _entry(self, url):
+        with self._lock:
+            return self._db.execute(
+                'SELECT b.path, b.size, u.etag, u.last_modified, u.checked_at '
+                'FROM urls u JOIN blobs b ON b.digest = u.digest WHERE u.url = ?',
+                (url,),
+            ).fetchone()
+    
+    def _live_entry(self, url):
+        """Como `_entry`, mas só se o arquivo ainda existe no disco
+        
+        Um arquivo apagado fora do crawl deixa a linha do índice órfã: ela é
+        removida e a URL volta a ser um miss (o próximo `put` regrava o blob).
+        """
+        entry = self._entry(url)
+        if entry is None or os.path.exists(os.path.join(self.root, entry[0])):
+            return entry
+        with self._lock:
+            self._db.execute('DELETE FROM urls WHERE url = ?', (url,))
+            self._db.commit()
+            self.stats['stale'] += 1
+        return None
+    
+    def _relpath(self, digest, extension):
+        return os.path.join(digest[:2], digest[2:4], digest + extension)
+    
+    def _write(self, relpath, data):
+        filepath = os.path.join(self.root, relpath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Gravação atômica: um crawl interrompido nunca deixa arquivo pela metade
+        tmp_path = filepath + '.part'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
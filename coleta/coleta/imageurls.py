@@ -0,0 +1,71 @@
+"""
+Canonicalização de URLs de imagem
+
+Normaliza a URL em uma única passada (sem parâmetros de redimensionamento,
+sem o slug SEO das imagens do MercadoLivre) e, para o CDN mlstatic,
+reescreve a URL para a variante de tamanho desejada. Variantes diferentes
+da mesma foto passam a ter a mesma URL e são baixadas uma única vez.
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+
+# Parâmetros de redimensionamento removidos da query string
+RESIZE_PARAMS = frozenset(['w', 'h', 'size', 'quality'])
+
+# https://http2.mlstatic.com/D_Q_NP_2X_676156-MLB74284527185_012024-E-slug-do-produto.webp
+MLSTATIC_URL = re.compile(
+    r'^https?://(?P<host>[\w.-]*mlstatic\.com)/'
+    r'(?P<prefix>D_(?:N?Q_)?NP_(?:2X_)?)'
+    r'(?P<picture>\d+-ML[A-Z]{1,2}\d+_\d+)'
+    r'-(?P<suffix>[A-Z])'
+    r'(?:-[^/.?#]*)?'
+    r'\.(?P<ext>[a-z]+)'
+    r'(?:[?#].*)?$'
+)
+
+# Variantes do CDN: nome -> (prefixo, sufixo). `listing` é o que os cards
+# da busca usam; `small` a menor que ainda serve de miniatura; `original`
+# a imagem em resolução completa da página do produto.
+ML_VARIANTS = {
+    'small': ('D_Q_NP_', 'E'),
+    'listing': ('D_Q_NP_2X_', 'E'),
+    'original': ('D_NQ_NP_', 'O'),
+}
+
+
+@lru_cache(maxsize=8192)
+def canonicalize_image_url(url, variant=None):
+    """Retorna a forma canônica da URL de imagem
+    
+    `variant` (uma chave de ML_VARIANTS) reescreve URLs do mlstatic para
+    essa variante; None mantém a variante original. data URIs e URLs
+    vazias são devolvidas sem alteração.
+    """
+    if not url or url.startswith('data:'):
+        return url
+    
+    match = MLSTATIC_URL.match(url)
+    if match:
+        if variant is None:
+            prefix, suffix = match.group('prefix'), match.group('suffix')
+        else:
+            prefix, suffix = ML_VARIANTS[variant]
+        return f"https://{match.group('host')}/{prefix}{match.group('picture')}-{suffix}.{match.group('ext')}"
+    
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = '&'.join(
+        pair for pair in parts.query.split('&')
+        if pair and pair.partition('=')[0] not in RESIZE_PARAMS
+    )
+    return urlunsplit(parts._replace(query=query))
+
+
+def picture_key(url):
+    """Identificador da foto independente da variante (None fora do mlstatic)"""
+    match = MLSTATIC_URL.match(url or '')
+    return match.group('picture') if match else None
@@ -2,32 +2,68 @@
 #
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
+#
+# Os itens são dataclasses com __slots__: o Scrapy (via itemadapter) os
+# exporta e passa pelos pipelines como qualquer item, com uma fração da
+# memória de um scrapy.Item e colunas já normalizadas no CSV.
+
+import re
+from dataclasses import dataclass
+
+from coleta.placeholders import is_placeholder
+
+
+# "R$332,49", "R$ 1.299", "1.299,9" -> reais (com ou sem milhar) e centavos
+PRICE_BRL = re.compile(r'(\d{1,3}(?:\.\d{3})+|\d+)(?:\s*,\s*(\d{1,2}))?')
+
+
+def parse_price_cents(text):
+    """Converte um preço em reais para centavos: 'R$332,49' -> 33249, 'R$ 1.299' -> 129900"""
+    if not text:
+        return None
+    match = PRICE_BRL.search(text)
+    if not match:
+        return None
+    reais, cents = match.groups()
+    return int(reais.replace('.', '')) * 100 + int((cents or '0').ljust(2, '0'))
+
+
+class ImageFieldsMixin:
+    __slots__ = ()
+    
+    def __post_init__(self):
+        # Placeholder de lazy-load (data URI) não vai para o CSV: só a flag
+        if self.image_url and is_placeholder(self.image_url):
+            self.image_url = None
+            self.is_base64 = True
+
+
+@dataclass(slots=True)
+class ColetaItem(ImageFieldsMixin):
+    source_id: str | None = None     # ID do anúncio (MLB...)
+    title: str | None = None
+    brand: str | None = None
+    price_cents: int | None = None   # Preço em centavos: R$332,49 -> 33249
+    link: str | None = None          # Link do produto
+    alt_text: str | None = None
+    image_url: str | None = None     # URL original da imagem
+    image_path: str | None = None    # Caminho local onde a imagem foi salva
+    is_base64: bool | None = None    # A página só tinha um placeholder base64
+    crawl_status: str | None = None  # new/changed/unchanged (modo incremental)
+
 
-import scrapy
-
-
-class ColetaItem(scrapy.Item):
-    # define the fields for your item here like:
-    brand = scrapy.Field()
-    price = scrapy.Field()
-    title = scrapy.Field()
-    image_url = scrapy.Field()  # URL original da imagem
-    image_path = scrapy.Field()  # Caminho local onde a imagem foi salva
-    alt_text = scrapy.Field()
-    is_base64 = scrapy.Field()  # Flag para indicar se é base64
-    link = scrapy.Field()  # Link do produto
-
-
-class TausteItem(scrapy.Item):
-    # Campos para produtos do Tauste
-    title = scrapy.Field()           # Título do produto
-    price = scrapy.Field()           # Preço
-    description = scrapy.Field()     # Descrição do produto
-    image_url = scrapy.Field()       # URL da imagem
-    image_path = scrapy.Field()      # Caminho local da imagem
-    product_link = scrapy.Field()    # Link do produto
-    page_number = scrapy.Field()     # Número da página
-    source_url = scrapy.Field()      # URL da página fonte
-    category = scrapy.Field()        # Categoria do produto
-    brand = scrapy.Field()           # Marca do produto
-    is_base64 = scrapy.Field()       # Flag para base64
+@dataclass(slots=True)
+class TausteItem(ImageFieldsMixin):
+    source_id: str | None = None     # Código do produto no site
+    title: str | None = None         # Título do produto
+    brand: str | None = None         # Marca do produto
+    price_cents: int | None = None   # Preço em centavos
+    description: str | None = None   # Descrição do produto
+    category: str | None = None      # Categoria do produto
+    product_link: str | None = None  # Link do produto
+    image_url: str | None = None     # URL da imagem
+    image_path: str | None = None    # Caminho local da imagem
+    is_base64: bool | None = None    # A página só tinha um placeholder base64
+    page_number: int | None = None   # Número da página
+    source_url: str | None = None    # URL da página fonte
+    crawl_status: str | None = None  # new/changed/unchanged (modo incremental)
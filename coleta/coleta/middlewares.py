@@ -3,12 +3,27 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import logging
+import re
+from collections import deque
+from time import monotonic
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
 
+logger = logging.getLogger(__name__)
+
+# Respostas que indicam bloqueio: o site pede para reduzir o ritmo
+BACKOFF_STATUS = {429, 503}
+# Página de captcha ou de login/verificação de conta (destino final de um
+# redirecionamento: o RedirectMiddleware, em 600, segue os 3xx antes daqui)
+BLOCKED_URL = re.compile(r'captcha|/login|/lgz/|account-verification|/challenge', re.I)
+
+
 class ColetaSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
@@ -53,48 +68,161 @@ class ColetaSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class AdaptiveSlotState:
+    """Estado do controle adaptativo de um slot do downloader (um host)"""
+    
+    def __init__(self, window=50):
+        self.latency = None  # média móvel exponencial da latência (s)
+        self.samples = deque(maxlen=window)  # latências recentes (referência)
+        self.slow = 0  # amostras seguidas acima do limite
+        self.healthy = 0  # respostas saudáveis desde o último ajuste
+        self.backoff_until = 0.0
+    
+    def baseline(self):
+        """Mediana da janela de latências recentes"""
+        ordered = sorted(self.samples)
+        return ordered[len(ordered) // 2]
+
+
 class ColetaDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """Controle adaptativo (AIMD) de concurrency e delay por slot do downloader
+    
+    Cada host parte da concurrency/delay configurados (DOWNLOAD_DELAY,
+    CONCURRENT_REQUESTS_PER_DOMAIN, DOWNLOAD_SLOTS). A cada janela de
+    respostas saudáveis o delay cai pela metade até ADAPTIVE_MIN_DELAY e,
+    depois disso, a concurrency sobe de 1 em 1 até ADAPTIVE_MAX_CONCURRENCY.
+    429/503, páginas de captcha/login, erros de conexão ou latência alta
+    cortam a concurrency pela metade (ou dobram o delay, se ela já estiver
+    no mínimo). Latência alta são ADAPTIVE_LATENCY_SAMPLES respostas
+    seguidas acima de ADAPTIVE_LATENCY_FLOOR segundos e de
+    ADAPTIVE_LATENCY_FACTOR vezes a mediana das últimas
+    ADAPTIVE_LATENCY_WINDOW. O estado atual de cada slot fica nas stats
+    `adaptive/<slot>/*`.
+    """
+    
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_ENABLED'):
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.min_concurrency = settings.getint('ADAPTIVE_MIN_CONCURRENCY', 1)
+        self.max_concurrency = settings.getint('ADAPTIVE_MAX_CONCURRENCY', 16)
+        self.min_delay = settings.getfloat('ADAPTIVE_MIN_DELAY', 0)
+        self.max_delay = settings.getfloat('ADAPTIVE_MAX_DELAY', 30)
+        self.latency_factor = settings.getfloat('ADAPTIVE_LATENCY_FACTOR', 2.0)
+        self.latency_floor = settings.getfloat('ADAPTIVE_LATENCY_FLOOR', 0.2)
+        self.latency_window = settings.getint('ADAPTIVE_LATENCY_WINDOW', 50)
+        self.latency_samples = settings.getint('ADAPTIVE_LATENCY_SAMPLES', 3)
+        self.cooldown = settings.getfloat('ADAPTIVE_COOLDOWN', 5)
+        self.debug = settings.getbool('ADAPTIVE_DEBUG')
+        self.states = {}
 
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(crawler)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        key, slot = self._get_slot(request)
+        if slot is None or 'cached' in response.flags:
+            return response
+        
+        state = self.state(key)
+        if response.status in BACKOFF_STATUS:
+            self.backoff(key, slot, state, str(response.status))
+        elif BLOCKED_URL.search(response.url):
+            self.backoff(key, slot, state, 'blocked')
+        else:
+            latency = request.meta.get('download_latency')
+            if latency is not None:
+                self.observe_latency(key, slot, state, latency)
+            if response.status < 500:
+                self.success(key, slot, state)
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
-
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+        key, slot = self._get_slot(request)
+        if slot is not None:
+            self.backoff(key, slot, self.state(key), 'exception')
+        return None
+    
+    def state(self, key):
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = AdaptiveSlotState(self.latency_window)
+        return state
+
+    def observe_latency(self, key, slot, state, latency):
+        """Atualiza a média da latência e recua se várias respostas seguidas forem lentas
+        
+        A referência é a mediana de uma janela recente, não o menor valor já
+        visto: um único request rápido não torna o resto "lento", e um único
+        pico não conta como lentidão. Abaixo de ADAPTIVE_LATENCY_FLOOR a
+        latência nunca conta como alta.
+        """
+        state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+        self.stats.set_value(f'adaptive/{key}/latency_ms', round(state.latency * 1000))
+        ready = len(state.samples) >= min(10, self.latency_window)
+        if (ready and latency > self.latency_floor
+                and latency > self.latency_factor * state.baseline()):
+            state.slow += 1
+        else:
+            state.slow = 0
+        state.samples.append(latency)
+        if state.slow >= self.latency_samples:
+            state.slow = 0
+            self.backoff(key, slot, state, 'latency')
+    
+    def success(self, key, slot, state):
+        """Aumento aditivo: uma janela (= concurrency) de respostas saudáveis por passo"""
+        state.healthy += 1
+        if state.healthy < slot.concurrency or monotonic() < state.backoff_until:
+            return
+        state.healthy = 0
+        if slot.delay > self.min_delay:
+            # Abaixo de 50 ms o delay só atrasa a fila: vai direto ao mínimo
+            slot.delay = max(self.min_delay, slot.delay / 2 if slot.delay >= 0.1 else 0)
+        elif slot.concurrency < self.max_concurrency:
+            slot.concurrency += 1
+        else:
+            return
+        self.stats.inc_value(f'adaptive/{key}/increase')
+        self._record(key, slot, 'increase')
+
+    def backoff(self, key, slot, state, reason):
+        """Recuo multiplicativo, no máximo um por ADAPTIVE_COOLDOWN segundos"""
+        self.stats.inc_value(f'adaptive/{key}/backoff/{reason}')
+        state.healthy = 0
+        now = monotonic()
+        if now < state.backoff_until:
+            return
+        state.backoff_until = now + self.cooldown
+        if slot.concurrency > self.min_concurrency:
+            slot.concurrency = max(self.min_concurrency, slot.concurrency // 2)
+        else:
+            slot.delay = min(self.max_delay, max(slot.delay * 2, 0.25, self.min_delay))
+        self._record(key, slot, f'backoff ({reason})')
+
+    def _get_slot(self, request):
+        key = request.meta.get('download_slot')
+        if key is None or request.meta.get('adaptive_dont_adjust'):
+            return None, None
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def _record(self, key, slot, event):
+        self.stats.set_value(f'adaptive/{key}/concurrency', slot.concurrency)
+        self.stats.set_value(f'adaptive/{key}/delay', round(slot.delay, 3))
+        if self.debug:
+            logger.info(
+                "slot: %(slot)s | %(event)s | conc: %(concurrency)d | delay: %(delay)d ms",
+                {'slot': key, 'event': event, 'concurrency': slot.concurrency, 'delay': slot.delay * 1000},
+            )
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
@@ -3,47 +3,165 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
-import os
-import re
+import base64
 import hashlib
-import requests
+import os
 from urllib.parse import urlparse
+
+import scrapy
 from itemadapter import ItemAdapter
-from scrapy.exceptions import DropItem
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import DeferredSemaphore
+
+from coleta.extensions import profile_pipeline
+from coleta.imagestore import DEFAULT_REVALIDATE_AFTER, ImageStore
+from coleta.imageurls import canonicalize_image_url
+from coleta.placeholders import is_data_uri, is_placeholder
+from coleta.productcache import listing_id_from_link
+from coleta.seenstore import SeenListingStore
 
 
 class ColetaPipeline:
+    @classmethod
+    def from_crawler(cls, crawler):
+        return profile_pipeline(crawler, cls())
+    
     def process_item(self, item, spider):
         return item
 
 
-class ImageProcessingPipeline:
-    """Pipeline para processar imagens e detectar base64"""
+class IncrementalPipeline:
+    """Pipeline do modo incremental (INCREMENTAL_ENABLED)
     
-    def __init__(self):
-        self.images_dir = 'images'
-        
-        # Criar diretório de imagens se não existir
-        if not os.path.exists(self.images_dir):
-            os.makedirs(self.images_dir)
+    Identifica cada anúncio pelo ID de origem e por um digest de
+    preço/título/imagem, compara com o SeenListingStore do crawl anterior e
+    marca `crawl_status` como new, changed ou unchanged. Itens inalterados
+    cujo arquivo de imagem ainda existe recebem o image_path já conhecido e
+    pulam o ImageProcessingPipeline; o estado final de cada item é gravado
+    quando ele é exportado.
+    """
+    
+    def __init__(self, store_path, crawler):
+        self.store = SeenListingStore(store_path)
+        self.crawler = crawler
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('INCREMENTAL_ENABLED'):
+            raise NotConfigured
+        pipeline = cls(crawler.settings.get('INCREMENTAL_STORE'), crawler)
+        crawler.signals.connect(pipeline.item_scraped, signal=signals.item_scraped)
+        return profile_pipeline(crawler, pipeline)
     
     def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        source_id = self.source_id(adapter)
+        if not source_id:
+            adapter['crawl_status'] = 'new'
+            self.crawler.stats.inc_value('incremental/new')
+            return item
+        
+        previous = self.store.get(spider.name, source_id)
+        if previous is None:
+            status = 'new'
+        elif previous[0] != self.digest(adapter):
+            status = 'changed'
+        else:
+            status = 'unchanged'
+            # Arquivo apagado (ou IMAGES_STORE trocado): o ImageProcessingPipeline baixa de novo
+            if previous[1] and os.path.exists(previous[1]):
+                adapter['image_path'] = previous[1]
+            elif previous[1]:
+                self.crawler.stats.inc_value('incremental/image_missing')
+        adapter['crawl_status'] = status
+        self.crawler.stats.inc_value(f'incremental/{status}')
+        return item
+    
+    def item_scraped(self, item, spider):
+        adapter = ItemAdapter(item)
+        source_id = self.source_id(adapter)
+        if source_id:
+            self.store.record(spider.name, source_id, self.digest(adapter), adapter.get('image_path'))
+    
+    def close_spider(self, spider):
+        self.store.close()
+    
+    def source_id(self, adapter):
+        """ID estável do anúncio: source_id do item, MLB do link, o próprio link ou título + marca"""
+        if adapter.get('source_id'):
+            return adapter['source_id']
+        link = adapter.get('link') or adapter.get('product_link')
+        if link:
+            return listing_id_from_link(link) or link
+        if adapter.get('title'):
+            return f"{adapter.get('title')}|{adapter.get('brand') or ''}"
+        return None
+    
+    def digest(self, adapter):
+        fingerprint = '\x1f'.join(
+            str(adapter.get(field) or '') for field in ('price_cents', 'title', 'image_url')
+        )
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+
+class ImageProcessingPipeline:
+    """Pipeline para processar imagens e detectar base64
+
+    Os downloads passam pelo downloader do próprio Scrapy: usam o mesmo pool
+    de conexões persistentes das páginas e não bloqueiam o reactor. Cada host
+    de imagens tem no máximo IMAGES_CONCURRENCY_PER_HOST downloads em andamento.
+    As imagens são gravadas no ImageStore (endereçado por conteúdo), que
+    revalida cópias antigas com requests condicionais (ETag/Last-Modified).
+    """
+    
+    def __init__(self, images_dir='images', concurrency_per_host=8,
+                 revalidate_after=DEFAULT_REVALIDATE_AFTER,
+                 variant=None, crawler=None):
+        self.images_dir = images_dir
+        self.concurrency_per_host = concurrency_per_host
+        self.variant = variant
+        self.crawler = crawler
+        self._semaphores = {}  # host -> DeferredSemaphore
+        self.store = ImageStore(self.images_dir, revalidate_after=revalidate_after)
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return profile_pipeline(crawler, cls(
+            images_dir=settings.get('IMAGES_STORE', 'images'),
+            concurrency_per_host=settings.getint('IMAGES_CONCURRENCY_PER_HOST', 8),
+            revalidate_after=settings.getfloat('IMAGES_REVALIDATE_AFTER', DEFAULT_REVALIDATE_AFTER),
+            variant=settings.get('IMAGES_ML_VARIANT'),
+            crawler=crawler,
+        ))
+    
+    async def process_item(self, item, spider):
         adapter = ItemAdapter(item)
         image_url = adapter.get('image_url')
         
         if not image_url:
             return item
         
-        # Verificar se é base64
-        if self.is_base64_image(image_url):
+        # Modo incremental: imagem do item inalterado já foi processada
+        if adapter.get('crawl_status') == 'unchanged' and adapter.get('image_path'):
+            return item
+        
+        # Verificar se é placeholder base64 (1x1, em branco, ilegível)
+        if is_placeholder(image_url):
             adapter['is_base64'] = True
             adapter['image_path'] = None
             # Log para debug
             spider.logger.info(f"Imagem base64 detectada para: {adapter.get('title', 'Sem título')}")
+        elif is_data_uri(image_url):
+            # Imagem real embutida na página: grava sem passar pela rede
+            adapter['is_base64'] = False
+            adapter['image_path'] = self.save_inline_image(image_url, spider)
         else:
             adapter['is_base64'] = False
             # Tentar baixar a imagem
-            image_path = self.download_image(image_url, adapter.get('title', 'sem_titulo'))
+            image_path = await self.download_image(image_url, spider)
             adapter['image_path'] = image_path
             if image_path:
                 spider.logger.info(f"Imagem baixada: {image_path}")
@@ -52,72 +170,97 @@ class ImageProcessingPipeline:
         
         return item
     
-    def is_base64_image(self, url):
-        """Verifica se a URL é uma imagem base64"""
-        if not url:
-            return False
-        return url.startswith('data:image/')
+    def close_spider(self, spider):
+        for key, value in self.store.stats.items():
+            self.crawler.stats.set_value(f'images/cache/{key}', value)
+        spider.logger.info(f"Cache de imagens: {self.store.summary()}")
+        self.store.close()
     
-    def download_image(self, url, title):
-        """Baixa a imagem da URL e salva localmente"""
+    def save_inline_image(self, url, spider):
+        """Decodifica um data URI base64 e salva no ImageStore
+        
+        O índice é chaveado pelo digest dos bytes em vez do data URI inteiro
+        (dezenas de KB por linha).
+        """
         try:
-            # Criar nome de arquivo único
-            filename = self.create_filename(url, title)
-            filepath = os.path.join(self.images_dir, filename)
-            
-            # Verificar se já existe
-            if os.path.exists(filepath):
+            data = base64.b64decode(url.partition(',')[2], validate=True)
+        except ValueError as e:
+            spider.logger.warning(f"Data URI inválido: {e}")
+            return None
+        key = f'data:sha256,{hashlib.sha256(data).hexdigest()}'
+        return self.store.put(key, data)
+    
+    async def download_image(self, url, spider):
+        """Baixa a imagem pelo downloader do Scrapy e salva no ImageStore"""
+        # Variantes da mesma foto viram a mesma URL antes de consultar o índice
+        url = canonicalize_image_url(url, self.variant)
+        try:
+            # Entrada fresca no índice: nenhum acesso à rede ou ao disco
+            filepath = self.store.cached(url)
+            if filepath:
                 return filepath
             
-            # Baixar a imagem
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
+            headers.update(self.store.conditional_headers(url))
+            request = scrapy.Request(
+                url,
+                headers=headers,
+                # Imagens ficam em hosts fora de allowed_domains (ex.: mlstatic)
+                meta={'allow_offsite': True},
+                dont_filter=True,
+            )
+            response = await self.fetch(request)
+            etag = self._header(response, 'ETag')
+            last_modified = self._header(response, 'Last-Modified')
             
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Salvar a imagem
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            # 304: a cópia local continua válida, nenhum byte de corpo
+            if response.status == 304:
+                return self.store.not_modified(url, etag, last_modified)
+            if response.status != 200:
+                raise ValueError(f"HTTP {response.status}")
             
-            return filepath
+            # Salvar a imagem (bytes idênticos são gravados uma única vez)
+            return self.store.put(url, response.body, etag, last_modified)
             
         except Exception as e:
-            print(f"Erro ao baixar imagem {url}: {str(e)}")
+            spider.logger.error(f"Erro ao baixar imagem {url}: {str(e)}")
             return None
     
-    def create_filename(self, url, title):
-        """Cria um nome de arquivo único para a imagem"""
-        # Extrair extensão da URL
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        extension = os.path.splitext(path)[1]
-        
-        if not extension:
-            # Tentar detectar extensão pelo content-type
-            if 'webp' in url.lower():
-                extension = '.webp'
-            elif 'jpg' in url.lower() or 'jpeg' in url.lower():
-                extension = '.jpg'
-            elif 'png' in url.lower():
-                extension = '.png'
-            else:
-                extension = '.jpg'  # Padrão
-        
-        # Criar nome baseado no título e hash da URL
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
-        safe_title = safe_title[:50]  # Limitar tamanho
-        
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-        
-        return f"{safe_title}_{url_hash}{extension}"
+    async def fetch(self, request):
+        """Envia o request ao downloader respeitando o limite por host"""
+        semaphore = self._semaphore_for(request.url)
+        await maybe_deferred_to_future(semaphore.acquire())
+        try:
+            engine = self.crawler.engine
+            # Scrapy 2.14+: download_async (download() emite deprecation warning)
+            if hasattr(engine, 'download_async'):
+                return await engine.download_async(request)
+            return await maybe_deferred_to_future(engine.download(request))
+        finally:
+            semaphore.release()
+    
+    def _header(self, response, name):
+        value = response.headers.get(name)
+        return value.decode('latin-1') if value else None
+    
+    def _semaphore_for(self, url):
+        host = urlparse(url).hostname or ''
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = DeferredSemaphore(self.concurrency_per_host)
+            self._semaphores[host] = semaphore
+        return semaphore
 
 
 class FilterBase64Pipeline:
     """Pipeline para filtrar itens com imagens base64 (opcional)"""
     
+    @classmethod
+    def from_crawler(cls, crawler):
+        return profile_pipeline(crawler, cls())
+    
     def process_item(self, item, spider):
         adapter = ItemAdapter(item)
         
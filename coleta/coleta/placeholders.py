@@ -0,0 +1,116 @@
+"""
+Classificação de imagens placeholder (data URIs de lazy-load)
+
+As listagens preenchem o `src` das imagens ainda não carregadas com data
+URIs minúsculos (GIF 1x1 transparente, PNG/WebP em branco, SVG vazio).
+Em vez de comparar com uma lista fixa de payloads, o classificador lê o
+cabeçalho do data URI, decodifica só os primeiros bytes do base64 e extrai
+as dimensões da imagem (GIF, PNG e WebP).
+"""
+
+import base64
+import binascii
+import csv
+import struct
+from functools import lru_cache
+
+
+# Bytes decodificados suficientes para as dimensões de GIF, PNG e WebP
+HEADER_BYTES = 30
+# Caracteres base64 que codificam HEADER_BYTES (múltiplo de 4)
+HEADER_CHARS = (HEADER_BYTES + 2) // 3 * 4
+# Imagens com algum lado menor ou igual a isto são placeholders
+MAX_PLACEHOLDER_SIDE = 1
+# Abaixo deste tamanho decodificado a imagem não tem conteúdo útil (em branco)
+MIN_IMAGE_BYTES = 256
+
+
+def is_data_uri(url):
+    """Verifica se a URL é um data URI de imagem"""
+    return bool(url) and url.startswith('data:image/')
+
+
+def is_placeholder(url):
+    """Verifica se a URL não aponta para uma imagem real
+    
+    URLs vazias e data URIs de placeholder (1x1, em branco, SVG, formato
+    ilegível) retornam True; URLs http(s) e data URIs com uma imagem de
+    verdade retornam False.
+    """
+    if not url:
+        return True
+    if not url.startswith('data:'):
+        return False
+    
+    header, sep, payload = url.partition(',')
+    if not sep:
+        return True
+    mime, _, params = header[5:].partition(';')
+    if 'base64' not in params.split(';'):
+        # Data URIs sem base64 (ex.: SVG url-encoded) só aparecem como placeholder
+        return True
+    # A classificação depende apenas do início do payload e do seu tamanho,
+    # então a chave do cache tem tamanho constante
+    return _classify_payload(mime.lower(), payload[:HEADER_CHARS], len(payload))
+
+
+@lru_cache(maxsize=4096)
+def _classify_payload(mime, head, payload_length):
+    if payload_length * 3 // 4 < MIN_IMAGE_BYTES:
+        return True
+    try:
+        data = base64.b64decode(head + '=' * (-len(head) % 4))
+    except (binascii.Error, ValueError):
+        return True
+    
+    dimensions = image_dimensions(data)
+    if dimensions is None:
+        return True
+    width, height = dimensions
+    return width <= MAX_PLACEHOLDER_SIDE or height <= MAX_PLACEHOLDER_SIDE
+
+
+def image_dimensions(data):
+    """Lê (largura, altura) do cabeçalho de um GIF, PNG ou WebP; None se ilegível"""
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and len(data) >= 30:
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and len(data) >= 25:
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X' and len(data) >= 30:
+            width = int.from_bytes(data[24:27], 'little') + 1
+            height = int.from_bytes(data[27:30], 'little') + 1
+            return width, height
+    
+    return None
+
+
+def classify_column(values):
+    """Classifica uma coluna inteira de URLs; retorna uma lista de bool
+    
+    Valores repetidos (o mesmo placeholder em centenas de linhas) são
+    classificados uma única vez.
+    """
+    results = {}
+    classified = []
+    for value in values:
+        result = results.get(value)
+        if result is None:
+            result = results[value] = is_placeholder(value)
+        classified.append(result)
+    return classified
+
+
+def classify_csv(path, column='image_url'):
+    """Classifica a coluna `column` de um CSV; retorna uma lista de bool"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return classify_column(row.get(column) for row in csv.DictReader(f))
@@ -0,0 +1,66 @@
+"""
+Cache persistente da imagem resolvida de cada anúncio do MercadoLivre
+"""
+
+import re
+import threading
+import time
+
+from coleta.db import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_images (
+    listing_id  TEXT PRIMARY KEY,
+    image_url   TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+"""
+
+# MLB-1234567890 (anúncio) ou /p/MLB12345678 (catálogo)
+LISTING_ID = re.compile(r'(?<![A-Z])(ML[A-Z])-?(\d{6,})')
+
+
+def listing_id_from_link(link):
+    """Extrai o ID do anúncio ('MLB1234567890') do link do produto, ou None"""
+    match = LISTING_ID.search(link or '')
+    if match is None:
+        return None
+    return match.group(1) + match.group(2)
+
+
+class ProductImageCache:
+    """Mapeia o ID do anúncio para a URL de imagem resolvida na página do produto
+    
+    Entradas com mais de `ttl` segundos são ignoradas (e sobrescritas na
+    próxima resolução), então trocas de foto do anúncio acabam sendo vistas.
+    """
+    
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(SCHEMA)
+    
+    def get(self, listing_id):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT image_url, resolved_at FROM product_images WHERE listing_id = ?',
+                (listing_id,),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+    
+    def set(self, listing_id, image_url):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO product_images (listing_id, image_url, resolved_at) '
+                'VALUES (?, ?, ?)',
+                (listing_id, image_url, time.time()),
+            )
+            self._db.commit()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,64 @@
+"""
+Registro persistente dos anúncios já vistos (modo incremental)
+"""
+
+import threading
+import time
+
+from coleta.db import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    spider     TEXT NOT NULL,
+    source_id  TEXT NOT NULL,
+    digest     TEXT NOT NULL,
+    image_path TEXT,
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL,
+    PRIMARY KEY (spider, source_id)
+);
+"""
+
+
+class SeenListingStore:
+    """Guarda, por spider e ID de origem, o digest do último estado visto
+    
+    As gravações são agrupadas (commit a cada `batch_size` anúncios e no
+    fechamento) para não custar um fsync por item.
+    """
+    
+    def __init__(self, path, batch_size=200):
+        self.batch_size = batch_size
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(SCHEMA)
+    
+    def get(self, spider, source_id):
+        """Retorna (digest, image_path) do último crawl, ou None"""
+        with self._lock:
+            return self._db.execute(
+                'SELECT digest, image_path FROM listings WHERE spider = ? AND source_id = ?',
+                (spider, source_id),
+            ).fetchone()
+    
+    def record(self, spider, source_id, digest, image_path):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO listings (spider, source_id, digest, image_path, first_seen, last_seen) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (spider, source_id) DO UPDATE SET '
+                'digest = excluded.digest, image_path = excluded.image_path, last_seen = excluded.last_seen',
+                (spider, source_id, digest, image_path, now, now),
+            )
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._db.commit()
+                self._pending = 0
+    
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -12,7 +12,9 @@ BOT_NAME = "coleta"
 SPIDER_MODULES = ["coleta.spiders"]
 NEWSPIDER_MODULE = "coleta.spiders"
 
-ADDONS = {}
+ADDONS = {
+    "coleta.addons.IncrementalAddon": 0,
+}
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -52,24 +54,85 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "coleta.middlewares.ColetaDownloaderMiddleware": 543,
-#}
+# O controle adaptativo fica acima do RetryMiddleware (550) para ver os 429/503
+DOWNLOADER_MIDDLEWARES = {
+    "coleta.middlewares.ColetaDownloaderMiddleware": 560,
+}
+
+# Concurrency/delay adaptativos por host (ColetaDownloaderMiddleware): os
+# valores de DOWNLOAD_DELAY/CONCURRENT_REQUESTS_PER_DOMAIN são só o ponto de
+# partida; o estado de cada host fica nas stats adaptive/<host>/*
+ADAPTIVE_ENABLED = True
+ADAPTIVE_MIN_CONCURRENCY = 1
+ADAPTIVE_MAX_CONCURRENCY = 16
+ADAPTIVE_MIN_DELAY = 0
+ADAPTIVE_MAX_DELAY = 30
+# Recuar quando a latência média passar de N vezes a mediana das últimas
+# ADAPTIVE_LATENCY_WINDOW respostas por ADAPTIVE_LATENCY_SAMPLES respostas
+# seguidas; latências abaixo de ADAPTIVE_LATENCY_FLOOR (s) nunca contam
+ADAPTIVE_LATENCY_FACTOR = 2.0
+ADAPTIVE_LATENCY_WINDOW = 50
+ADAPTIVE_LATENCY_SAMPLES = 3
+ADAPTIVE_LATENCY_FLOOR = 0.2
+# Intervalo mínimo (s) entre dois recuos do mesmo host
+ADAPTIVE_COOLDOWN = 5
+#ADAPTIVE_DEBUG = True
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    #"scrapy.extensions.telnet.TelnetConsole": None,
+    "coleta.extensions.ProfilingExtension": 500,
+}
+
+# Profiling por callback do spider e por pipeline (coleta.extensions):
+# tempos de parede/CPU, histogramas, itens e bytes nas stats profile/* e
+# num relatório JSON ao fechar o spider:
+#   scrapy crawl tauste -s PROFILING_ENABLED=True -s PROFILING_CPROFILE_TOP=5
+PROFILING_ENABLED = False
+PROFILING_REPORT = "profiles/%(name)s_%(time)s.json"
+# Métodos do spider a cronometrar (vazio = todos os métodos públicos)
+PROFILING_SPIDER_METHODS = []
+# Dumps do cProfile das N páginas mais lentas, ao lado do relatório; 0 = desligado
+PROFILING_CPROFILE_TOP = 0
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
+    "coleta.pipelines.IncrementalPipeline": 200,
     "coleta.pipelines.ImageProcessingPipeline": 300,
     "coleta.pipelines.FilterBase64Pipeline": 400,
     "coleta.pipelines.ColetaPipeline": 500,
 }
 
+# Modo incremental: anúncios já vistos ficam em INCREMENTAL_STORE; itens
+# inalterados não passam pelo processamento de imagens e só itens novos ou
+# alterados vão para INCREMENTAL_DELTA_FEED (o -o continua com o snapshot):
+#   scrapy crawl mercadolivre -s INCREMENTAL_ENABLED=True -o snapshot.csv
+INCREMENTAL_ENABLED = False
+INCREMENTAL_STORE = ".cache/seen_listings.sqlite"
+INCREMENTAL_DELTA_FEED = "delta/%(name)s_%(time)s.csv"
+
+# Imagens são baixadas pelo downloader do Scrapy (ImageProcessingPipeline)
+IMAGES_STORE = "images"
+# Downloads de imagem simultâneos por host
+IMAGES_CONCURRENCY_PER_HOST = 8
+# Imagens verificadas há menos de N segundos são servidas do disco sem
+# request; as mais antigas são revalidadas com request condicional
+# (ETag/Last-Modified). 0 = revalidar todas uma vez por execução
+IMAGES_REVALIDATE_AFTER = 24 * 3600
+# Variante de tamanho das imagens do mlstatic: "small", "listing", "original"
+# (ver coleta.imageurls.ML_VARIANTS) ou None para manter a da página
+IMAGES_ML_VARIANT = "listing"
+# Cache persistente ID do anúncio -> imagem resolvida na página do produto
+# (MercadolivreSpider); caminho vazio desativa
+PRODUCT_IMAGE_CACHE_PATH = ".cache/product_images.sqlite"
+PRODUCT_IMAGE_CACHE_TTL = 7 * 24 * 3600
+# O CDN de imagens do MercadoLivre não herda o DOWNLOAD_DELAY das listagens
+DOWNLOAD_SLOTS = {
+    "http2.mlstatic.com": {"concurrency": IMAGES_CONCURRENCY_PER_HOST, "delay": 0},
+}
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -90,6 +153,12 @@ ITEM_PIPELINES = {
 #HTTPCACHE_DIR = "httpcache"
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Cache comprimido em um único arquivo SQLite por spider (coleta.httpcache).
+# Replay offline de um crawl já cacheado:
+#   scrapy crawl tauste -s HTTPCACHE_ENABLED=True -s HTTPCACHE_SQLITE_READONLY=True \
+#       -s HTTPCACHE_IGNORE_MISSING=True
+HTTPCACHE_STORAGE = "coleta.httpcache.SqliteCacheStorage"
+HTTPCACHE_SQLITE_READONLY = False
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
@@ -1,54 +1,262 @@
 import scrapy
-from coleta.items import ColetaItem
+from coleta.items import ColetaItem, parse_price_cents
+from coleta.imageurls import canonicalize_image_url
+from coleta.placeholders import is_placeholder
+from coleta.productcache import ProductImageCache, listing_id_from_link
+import json
+import math
 import re
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit
+
+from lxml import etree
+from parsel import css2xpath
 # dicas do processo https://www.notion.so/Projeto-Scrapping-219a06795c3680ef9696d4dd76f0bbda?showMoveTo=true&saveParent=true
 
+# Paginação por offset do MercadoLivre: /tenis-corrida-masculino_Desde_51_NoIndex_True
+DESDE_SUFFIX = re.compile(r'(?:_Desde_\d+)?(?:_NoIndex_True)?$')
+# Estado embutido na página 1: "paging":{"total":1234,"offset":0,"limit":50,...}
+PAGING_TOTAL = re.compile(rb'"paging"\s*:\s*\{[^{}]*?"total"\s*:\s*(\d+)')
+PAGING_LIMIT = re.compile(rb'"paging"\s*:\s*\{[^{}]*?"limit"\s*:\s*(\d+)')
+# Maior offset _Desde_ que a busca serve; páginas além dele voltam vazias
+MAX_RESULTS_OFFSET = 2000
+
+# Estratégias de get_next_page, na ordem inicial de tentativa
+NEXT_PAGE_STRATEGIES = ('json', 'desde', 'pagination')
+NEXT_PAGE_JSON = re.compile(rb'"next_page"\s*:\s*\{[^}]*"url"\s*:\s*"([^"]+)"')
+NEXT_PAGE_DESDE = re.compile(rb'https://[^"\s<>]*?_Desde_(\d+)_NoIndex_True')
+DESDE_OFFSET = re.compile(rb'_Desde_(\d+)')
+# Links "próxima página", em ordem de prioridade: a primeira expressão com
+# resultado vence (uma união devolveria os nós em ordem de documento)
+NEXT_PAGE_LABELS = ('Seguinte', 'Próxima', 'Next')
+NEXT_PAGE_XPATHS = tuple(etree.XPath(expression) for expression in (
+    *(f'//a[contains(@class,"andes-pagination__link") and contains(@aria-label,"{label}")]/@href'
+      for label in NEXT_PAGE_LABELS),
+    *(f'//a[contains(@class,"andes-pagination__link") and contains(text(),"{label}")]/@href'
+      for label in NEXT_PAGE_LABELS),
+    # Fallbacks gerais
+    *(f'//a[contains(text(),"{label}")]/@href' for label in NEXT_PAGE_LABELS),
+    '//a[contains(@class,"andes-pagination__button--next")]/@href',
+    '//li[contains(@class,"andes-pagination__button--next")]/a/@href',
+    '//a[@data-testid="pagination-next"]/@href',
+    *(f'//a[contains(@aria-label,"{label}")]/@href' for label in ('Próxima', 'Next', 'Seguinte')),
+))
+
+# Estado pré-carregado com os resultados da busca
+PRELOADED_STATE_SCRIPT = re.compile(rb'<script[^>]*id="__PRELOADED_STATE__"[^>]*>(.*?)</script>', re.S)
+PRELOADED_STATE_ASSIGNMENT = re.compile(rb'__PRELOADED_STATE__\s*=\s*(?=\{)')
+MLSTATIC_PICTURE_URL = 'https://http2.mlstatic.com/D_Q_NP_2X_{}-E.webp'
+
+# Extração dos cards: os `div.poly-card` são encontrados com uma consulta
+# pela página e cada campo é um XPath pré-compilado relativo ao card, que só
+# percorre a subárvore dele e para no primeiro resultado (como `.get()`)
+POLY_CARD = 'div.poly-card'
+CARD_XPATH = etree.XPath(css2xpath(POLY_CARD))
+CARD_FIELD_XPATHS = tuple(
+    (field, etree.XPath(f'({css2xpath(css)})[1]'))
+    for field, css in (
+        ('brand', 'span.poly-component__brand::text'),
+        ('title', 'a.poly-component__title *::text'),
+        ('alt_text', 'img.poly-component__picture::attr(alt)'),
+        ('link', 'a.poly-component__link::attr(href)'),
+        ('image_url', 'img.poly-component__picture::attr(src)'),
+    )
+)
+# Texto do preço inteiro: "R$" + fração + centavos
+CARD_PRICE_XPATH = etree.XPath(f"string(({css2xpath('span.andes-money-amount')})[1])")
+
+# Busca por termo ou slug de categoria: "tenis corrida masculino" -> /tenis-corrida-masculino
+SEARCH_URL = 'https://lista.mercadolivre.com.br/{}'
+SLUG_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(text):
+    """'Tênis Corrida Masculino' -> 'tenis-corrida-masculino'"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return SLUG_SEPARATORS.sub('-', text.lower()).strip('-')
+
+
+def split_queries(text):
+    """Separa o argumento `queries` nas vírgulas, sem quebrar URLs
+    
+    Uma URL pode conter vírgulas (filtros de preço, atributos), mas nunca
+    espaços: depois de uma URL, o trecho seguinte só continua a URL se não
+    tiver espaço nenhum e não for outra URL. Entre termos soltos qualquer
+    vírgula separa; use ", " depois de uma URL.
+    """
+    specs = []
+    for chunk in text.split(','):
+        previous = specs[-1].lstrip() if specs else ''
+        if (previous.startswith(('http://', 'https://')) and chunk
+                and not any(c.isspace() for c in chunk)
+                and not chunk.startswith(('http://', 'https://'))):
+            specs[-1] += ',' + chunk
+        else:
+            specs.append(chunk)
+    return [spec for spec in specs if spec.strip()]
+
+
+def parse_query(spec):
+    """Converte 'termo', 'slug' ou 'URL', com limite opcional 'termo;N', em (nome, url, max_pages)"""
+    spec = spec.strip()
+    head, _, max_pages = spec.rpartition(';')
+    if head and max_pages.strip().isdigit():
+        spec, max_pages = head.strip(), int(max_pages)
+    else:
+        max_pages = None  # sem limite (um ';' no meio de uma URL não é limite)
+    if spec.startswith(('http://', 'https://')):
+        path = DESDE_SUFFIX.sub('', urlsplit(spec).path.rstrip('/'), count=1)
+        name = slugify(path.rsplit('/', 1)[-1]) or slugify(urlsplit(spec).netloc)
+        return name, spec, max_pages
+    name = slugify(spec)
+    return name, SEARCH_URL.format(name), max_pages
+
+
+def find_polycards(state, depth=0):
+    """Procura no estado a lista de resultados e retorna seus `polycard`s"""
+    if depth > 8:
+        return None
+    if isinstance(state, dict):
+        results = state.get('results')
+        if isinstance(results, list):
+            polycards = [r['polycard'] for r in results if isinstance(r, dict) and isinstance(r.get('polycard'), dict)]
+            if polycards:
+                return polycards
+        children = state.values()
+    elif isinstance(state, list):
+        children = state
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            polycards = find_polycards(child, depth + 1)
+            if polycards:
+                return polycards
+    return None
+
+
+def extract_card_fields(root):
+    """Um dict {campo: valor ou None} por `div.poly-card`, na ordem da página"""
+    cards = []
+    for card in CARD_XPATH(root):
+        fields = {'price': CARD_PRICE_XPATH(card)}
+        for field, xpath in CARD_FIELD_XPATHS:
+            result = xpath(card)
+            fields[field] = str(result[0]) if result else None
+        cards.append(fields)
+    return cards
+
+
+def _component_value(components, kind, key):
+    component = components.get(kind) or {}
+    return (component.get(kind) or {}).get(key)
+
+
 class MercadolivreSpider(scrapy.Spider):
     name = "mercadolivre"
     allowed_domains = ["lista.mercadolivre.com.br"]
     start_urls = ["https://lista.mercadolivre.com.br/tenis-corrida-masculino"]
     
-    # Configurações de paginação
+    # Ritmo inicial; ColetaDownloaderMiddleware ajusta a partir daqui
     custom_settings = {
         'DOWNLOAD_DELAY': 1,  # Delay entre requests para evitar bloqueio
         'RANDOMIZE_DOWNLOAD_DELAY': 0.5,  # Randomização do delay
         'CONCURRENT_REQUESTS_PER_DOMAIN': 2,  # Limitar requests simultâneos
     }
     
-    def __init__(self, max_pages=None, *args, **kwargs):
+    def __init__(self, max_pages=None, fanout=None, extraction='css', queries=None, queries_file=None, *args, **kwargs):
         super(MercadolivreSpider, self).__init__(*args, **kwargs)
         self.max_pages = int(max_pages) if max_pages else None
-        self.current_page = 0
+        # queries="tenis corrida;5,chuteira" e/ou queries_file=arquivo com um
+        # termo, slug de categoria ou URL por linha (limite opcional "termo;N");
+        # todas as buscas são intercaladas no mesmo processo
+        specs = split_queries(queries or '')
+        if queries_file:
+            with open(queries_file, encoding='utf-8') as f:
+                specs.extend(line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        self.queries = {}
+        for name, url, query_max_pages in map(parse_query, specs or self.start_urls):
+            if any(url == known for known, _ in self.queries.values()):
+                self.logger.warning(f"Busca repetida ignorada: {url}")
+                continue
+            # Buscas diferentes com o mesmo slug não se sobrescrevem: tenis, tenis-2, ...
+            unique, n = name, 1
+            while unique in self.queries:
+                n += 1
+                unique = f'{name}-{n}'
+            if unique != name:
+                self.logger.warning(f"Busca {url} renomeada para {unique} ({name} já existe)")
+            self.queries[unique] = (url, query_max_pages or self.max_pages)
+        self.start_urls = [url for url, _ in self.queries.values()]
+        # URLs de categoria podem estar em outro subdomínio
+        self.allowed_domains = sorted(
+            set(self.allowed_domains) | {urlsplit(url).hostname for url in self.start_urls}
+        )
+        # extraction=json: itens a partir do estado JSON embutido na página,
+        # com os seletores CSS como fallback
+        self.extraction = extraction
+        # fanout=1: lê o total de resultados na página 1 e agenda todos os
+        # offsets de uma vez, em vez de seguir a próxima página em série
+        self.fanout = str(fanout).lower() in ('1', 'true', 'yes', 'sim')
+        self.current_page = 0  # páginas processadas (o número da página vai no meta)
+        self.next_page_strategies = list(NEXT_PAGE_STRATEGIES)
+        self.image_cache = None  # aberto em from_crawler (PRODUCT_IMAGE_CACHE_PATH)
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        cache_path = crawler.settings.get('PRODUCT_IMAGE_CACHE_PATH')
+        spider.image_cache = ProductImageCache(
+            cache_path, crawler.settings.getfloat('PRODUCT_IMAGE_CACHE_TTL')
+        ) if cache_path else None
+        return spider
+
+    async def start(self):
+        # O Scrapy 2.13+ só chama start(); start_requests() fica para versões anteriores
+        for request in self.start_requests():
+            yield request
+    
     def start_requests(self):
-        for url in self.start_urls:
-            yield scrapy.Request(url, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
+        for query, (url, _) in self.queries.items():
+            yield scrapy.Request(
+                url,
+                meta={'page': 1, 'query': query},
+                priority=-1,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                }
+            )
 
     def parse(self, response):
         self.current_page += 1
-        self.logger.info(f"Processando página {self.current_page}")
+        page = response.meta.get('page', 1)
+        query = response.meta.get('query')
+        max_pages = self.queries[query][1] if query in self.queries else self.max_pages
+        self.logger.info(f"Processando página {page} ({query})")
         
-        cards = response.css('div.poly-card')  # elemento-pai que contém imagem + conteúdo
-        for card in cards:
-            item = ColetaItem()
-            
-            # Dados básicos
-            item['brand'] = card.css('span.poly-component__brand::text').get()
-            item['price'] = card.css('span.andes-money-amount').xpath('string(.)').get()
-            item['title'] = card.css('a.poly-component__title *::text').get()
-            item['alt_text'] = card.css('img.poly-component__picture::attr(alt)').get()
-            item['link'] = card.css('a.poly-component__link::attr(href)').get()
-            
-            # Processar imagem
-            image_url = card.css('img.poly-component__picture::attr(src)').get()
-            
+        cards = None
+        if self.extraction == 'json':
+            cards = self.extract_cards_from_state(response)
+            if cards is None:
+                self.logger.info("Estado JSON não encontrado - usando seletores CSS")
+        if cards is None:
+            cards = self.extract_cards_from_html(response)
+        
+        if query:
+            self.crawler.stats.inc_value(f'mercadolivre/query/{query}/pages')
+            self.crawler.stats.inc_value(f'mercadolivre/query/{query}/items', len(cards))
+        
+        for item, image_url in cards:
             # Tentar obter imagem real se for base64
-            if image_url and self.is_base64_placeholder(image_url):
+            if image_url and is_placeholder(image_url):
                 # Tentar obter imagem real do link do produto
-                product_link = item['link']
-                if product_link:
+                product_link = item.link
+                cached_url = self.cached_product_image(product_link)
+                if cached_url:
+                    # Já resolvida em um crawl anterior: sem ida à página do produto
+                    item.image_url = cached_url
+                    yield item
+                elif product_link:
                     yield scrapy.Request(
                         product_link,
                         callback=self.parse_product_image,
@@ -58,31 +266,169 @@ class MercadolivreSpider(scrapy.Spider):
                         }
                     )
                 else:
-                    item['image_url'] = image_url
+                    item.is_base64 = True
                     yield item
             else:
-                item['image_url'] = image_url
+                item.image_url = canonicalize_image_url(
+                    image_url, self.settings.get('IMAGES_ML_VARIANT')
+                )
                 yield item
         
-        # Processar paginação - buscar próxima página
-        next_page = self.get_next_page(response)
+        # Páginas agendadas pelo fan-out não encadeiam a próxima
+        if response.meta.get('fanout'):
+            return
         
         # Verificar se atingiu o limite de páginas
-        if self.max_pages and self.current_page >= self.max_pages:
-            self.logger.info(f"Limite de {self.max_pages} páginas atingido. Parando.")
+        if max_pages and page >= max_pages:
+            self.logger.info(f"Limite de {max_pages} páginas atingido ({query}). Parando.")
             return
         
+        if self.fanout and page == 1:
+            page_requests = list(self.fanout_pages(response, len(cards), query, max_pages))
+            if page_requests:
+                yield from page_requests
+                return
+            self.logger.info("Total de resultados não encontrado - seguindo paginação em série")
+        
+        # Processar paginação - buscar próxima página
+        next_page = self.get_next_page(response)
+        
         if next_page:
             self.logger.info(f"Indo para próxima página: {next_page}")
+            # Prioridade -página: a página N de todas as buscas antes da N+1
             yield response.follow(
                 next_page, 
                 callback=self.parse,
+                meta={'page': page + 1, 'query': query},
+                priority=-(page + 1),
                 headers={
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                 }
             )
         else:
             self.logger.info("Chegou ao fim das páginas")
+    
+    def extract_cards_from_html(self, response):
+        """Extrai (item, url da imagem) de cada `div.poly-card` (elemento-pai que contém imagem + conteúdo)"""
+        cards = []
+        for fields in extract_card_fields(response.selector.root):
+            item = ColetaItem(
+                source_id=listing_id_from_link(fields['link']),
+                title=fields['title'],
+                brand=fields['brand'],
+                price_cents=parse_price_cents(fields['price']),
+                link=fields['link'],
+                alt_text=fields['alt_text'],
+            )
+            # O src costuma ser um placeholder de lazy-load
+            cards.append((item, fields['image_url']))
+        return cards
+    
+    def extract_cards_from_state(self, response):
+        """Extrai (item, url da imagem) do estado JSON pré-carregado da página
+        
+        O blob `__PRELOADED_STATE__` traz título, preço, marca, permalink e os
+        IDs reais das fotos de todos os resultados, então os itens não
+        dependem do `src` de lazy-load nem da página do produto. Retorna None
+        se o blob não existir ou não tiver resultados.
+        """
+        state = self.load_preloaded_state(response)
+        results = find_polycards(state) if state is not None else None
+        if not results:
+            return None
+        
+        cards = []
+        for polycard in results:
+            metadata = polycard.get('metadata') or {}
+            components = {
+                component.get('type'): component
+                for component in polycard.get('components') or []
+                if isinstance(component, dict)
+            }
+            title = _component_value(components, 'title', 'text')
+            price = (_component_value(components, 'price', 'current_price') or {}).get('value')
+            link = metadata.get('url')
+            if link and not link.startswith('http'):
+                link = f"https://{link}"
+            
+            item = ColetaItem(
+                source_id=metadata.get('id') or listing_id_from_link(link),
+                title=title,
+                brand=_component_value(components, 'brand', 'text'),
+                price_cents=round(price * 100) if price is not None else None,
+                link=link,
+                alt_text=title,
+            )
+            
+            pictures = (polycard.get('pictures') or {}).get('pictures') or []
+            picture_id = pictures[0].get('id') if pictures else None
+            image_url = MLSTATIC_PICTURE_URL.format(picture_id) if picture_id else None
+            cards.append((item, image_url))
+        return cards
+    
+    def load_preloaded_state(self, response):
+        """Decodifica o blob JSON `__PRELOADED_STATE__` da página (ou None)"""
+        body = response.body
+        match = PRELOADED_STATE_SCRIPT.search(body)
+        try:
+            if match:
+                return json.loads(match.group(1))
+            match = PRELOADED_STATE_ASSIGNMENT.search(body)
+            if match:
+                state, _ = json.JSONDecoder().raw_decode(body[match.end():].decode('utf-8'))
+                return state
+        except ValueError as e:
+            self.logger.debug(f"Erro ao decodificar estado JSON: {e}")
+        return None
+    
+    def fanout_pages(self, response, cards_on_page, query=None, max_pages=None):
+        """Agenda de uma vez todas as páginas seguintes a partir do total da página 1"""
+        total = self.get_total_results(response)
+        page_size = self.get_page_size(response) or cards_on_page
+        if not total or not page_size:
+            return
+        
+        last_page = min(math.ceil(total / page_size), (MAX_RESULTS_OFFSET - 1) // page_size + 1)
+        if max_pages:
+            last_page = min(last_page, max_pages)
+        self.logger.info(f"{total} resultados, {page_size} por página: agendando páginas 2 a {last_page}")
+        
+        for page in range(2, last_page + 1):
+            yield scrapy.Request(
+                self.build_page_url(response.url, page, page_size),
+                callback=self.parse,
+                meta={'page': page, 'query': query, 'fanout': True},
+                priority=-page,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                }
+            )
+    
+    def get_total_results(self, response):
+        """Total de resultados da busca (estado JSON ou contador da página)"""
+        match = PAGING_TOTAL.search(response.body)
+        if match:
+            return int(match.group(1))
+        
+        quantity = response.css('.ui-search-search-result__quantity-results::text').get()
+        if quantity:
+            digits = re.sub(r'\D', '', quantity)
+            if digits:
+                return int(digits)
+        return None
+    
+    def get_page_size(self, response):
+        """Resultados por página declarados no estado JSON"""
+        match = PAGING_LIMIT.search(response.body)
+        return int(match.group(1)) if match else None
+    
+    def build_page_url(self, url, page, page_size):
+        """Monta a URL `_Desde_<offset>_NoIndex_True` da página `page`"""
+        parts = urlsplit(url)
+        path = DESDE_SUFFIX.sub('', parts.path, count=1)
+        if page > 1:
+            path = f"{path}_Desde_{(page - 1) * page_size + 1}_NoIndex_True"
+        return urlunsplit(parts._replace(path=path))
    
     def parse_product_image(self, response):
         """Extrai imagem real da página do produto"""
@@ -102,143 +448,98 @@ class MercadolivreSpider(scrapy.Spider):
         
         for selector in image_selectors:
             image_url = response.css(selector).get()
-            if image_url and not self.is_base64_placeholder(image_url):
-                # Limpar URL (remover parâmetros de redimensionamento)
-                clean_url = self.clean_image_url(image_url)
-                item['image_url'] = clean_url
+            if image_url and not is_placeholder(image_url):
+                # URL canônica na variante de tamanho configurada
+                item.image_url = canonicalize_image_url(
+                    image_url, self.settings.get('IMAGES_ML_VARIANT')
+                )
+                if self.image_cache is not None:
+                    listing_id = item.source_id or listing_id_from_link(item.link)
+                    if listing_id:
+                        self.image_cache.set(listing_id, item.image_url)
                 break
         else:
-            # Se não encontrou imagem real, usar a original
-            item['image_url'] = None
+            # Se não encontrou imagem real, fica só a flag do placeholder
+            item.image_url = None
+            item.is_base64 = True
         
         yield item
     
-    def is_base64_placeholder(self, url):
-        """Verifica se é um placeholder base64 (1x1 pixel transparente)"""
-        if not url:
-            return True
-        
-        # Verificar se é base64
-        if url.startswith('data:image/'):
-            # Verificar se é o placeholder específico do MercadoLivre
-            placeholder_patterns = [
-                'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7',
-                'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
-            ]
-            return any(pattern in url for pattern in placeholder_patterns)
-        
-        return False
-    
-    def clean_image_url(self, url):
-        """Remove parâmetros de redimensionamento da URL da imagem"""
-        if not url:
-            return url
-        
-        # Remover parâmetros comuns de redimensionamento
-        url = re.sub(r'[?&]w=\d+', '', url)
-        url = re.sub(r'[?&]h=\d+', '', url)
-        url = re.sub(r'[?&]size=\d+', '', url)
-        url = re.sub(r'[?&]quality=\d+', '', url)
-        
-        # Remover parâmetros específicos do MercadoLivre
-        url = re.sub(r'[?&]D_Q_NP_\d+', '', url)
-        
-        # Limpar URLs que terminam com parâmetros vazios
-        url = re.sub(r'[?&]+$', '', url)
-        
-        return url
+    def cached_product_image(self, product_link):
+        """URL de imagem já resolvida para o anúncio (cache persistente), ou None"""
+        if self.image_cache is None:
+            return None
+        listing_id = listing_id_from_link(product_link)
+        if not listing_id:
+            return None
+        image_url = self.image_cache.get(listing_id)
+        result = 'hit' if image_url else 'miss'
+        self.crawler.stats.inc_value(f'mercadolivre/product_image_cache/{result}')
+        return image_url
     
     def get_next_page(self, response):
-        """Extrai o link da próxima página usando múltiplos métodos"""
-        import json
-        import re
-        
-        # Método 1: Extrair dos dados JSON no HTML
-        try:
-            # Procurar por padrões JSON que contenham next_page
-            json_patterns = [
-                r'"next_page":\s*\{[^}]*"url":\s*"([^"]+)"',
-                r'"next_page":\s*\{[^}]*"value":\s*"Seguinte"[^}]*"url":\s*"([^"]+)"',
-            ]
-            
-            for pattern in json_patterns:
-                matches = re.findall(pattern, response.text)
-                if matches:
-                    next_url = matches[0].replace('\\u002F', '/')
-                    self.logger.info(f"Próxima página encontrada (JSON): {next_url}")
-                    return next_url
-        except Exception as e:
-            self.logger.debug(f"Erro ao extrair JSON: {e}")
-        
-        # Método 2: Extrair URLs com padrão "Desde_X"
-        try:
-            # Procurar por URLs que contenham "Desde_" (padrão do MercadoLivre)
-            desde_pattern = r'https://[^"]*_Desde_\d+_NoIndex_True'
-            matches = re.findall(desde_pattern, response.text)
-            if matches:
-                # Pegar a primeira URL que não seja a atual
-                current_url = response.url
-                for url in matches:
-                    if url != current_url and '_Desde_' in url:
-                        self.logger.info(f"Próxima página encontrada (Desde): {url}")
-                        return url
-        except Exception as e:
-            self.logger.debug(f"Erro ao extrair Desde: {e}")
-        
-        # Método 3: Seletores XPath tradicionais (fallback)
-        next_page_selectors = [
-            # Priorizar a classe específica que você confirmou
-            '//a[contains(@class,"andes-pagination__link") and contains(@aria-label,"Seguinte")]/@href',
-            '//a[contains(@class,"andes-pagination__link") and contains(@aria-label,"Próxima")]/@href',
-            '//a[contains(@class,"andes-pagination__link") and contains(@aria-label,"Next")]/@href',
-            '//a[contains(@class,"andes-pagination__link") and contains(text(),"Seguinte")]/@href',
-            '//a[contains(@class,"andes-pagination__link") and contains(text(),"Próxima")]/@href',
-            '//a[contains(@class,"andes-pagination__link") and contains(text(),"Next")]/@href',
-            # Fallbacks gerais
-            '//a[contains(text(),"Seguinte")]/@href',
-            '//a[contains(text(),"Próxima")]/@href',
-            '//a[contains(text(),"Next")]/@href',
-            '//a[contains(@class,"andes-pagination__button--next")]/@href',
-            '//li[contains(@class,"andes-pagination__button--next")]/a/@href',
-            '//a[@data-testid="pagination-next"]/@href',
-            '//a[contains(@aria-label,"Próxima")]/@href',
-            '//a[contains(@aria-label,"Next")]/@href',
-            '//a[contains(@aria-label,"Seguinte")]/@href',
-        ]
-        
-        for selector in next_page_selectors:
-            next_page = response.xpath(selector).get()
-            if next_page and next_page.strip():
-                self.logger.info(f"Próxima página encontrada (XPath): {next_page}")
-                return next_page
-        
-        # Método 4: Seletores CSS (fallback)
-        css_selectors = [
-            # Priorizar a classe específica que você confirmou
-            'a.andes-pagination__link[aria-label*="Seguinte"]::attr(href)',
-            'a.andes-pagination__link[aria-label*="Próxima"]::attr(href)',
-            'a.andes-pagination__link[aria-label*="Next"]::attr(href)',
-            'a.andes-pagination__link:contains("Seguinte")::attr(href)',
-            'a.andes-pagination__link:contains("Próxima")::attr(href)',
-            'a.andes-pagination__link:contains("Next")::attr(href)',
-            # Fallbacks gerais
-            'a.andes-pagination__button--next::attr(href)',
-            'li.andes-pagination__button--next a::attr(href)',
-            'a[data-testid="pagination-next"]::attr(href)',
-            '.andes-pagination__button a[aria-label*="Próxima"]::attr(href)',
-            '.andes-pagination__button a[aria-label*="Next"]::attr(href)',
-            '.andes-pagination__button a[aria-label*="Seguinte"]::attr(href)',
-        ]
+        """Extrai o link da próxima página
         
-        for selector in css_selectors:
-            next_page = response.css(selector).get()
-            if next_page and next_page.strip():
-                self.logger.info(f"Próxima página encontrada (CSS): {next_page}")
+        Cada estratégia roda uma única vez sobre os bytes brutos (regex) ou a
+        árvore já parseada (XPath pré-compilado). A estratégia que acertou por
+        último é tentada primeiro na página seguinte; tentativas e acertos de
+        cada uma vão para as stats do crawl.
+        """
+        stats = self.crawler.stats
+        for name in list(self.next_page_strategies):
+            stats.inc_value(f'mercadolivre/next_page/{name}/tried')
+            next_page = getattr(self, f'next_page_from_{name}')(response)
+            if next_page:
+                stats.inc_value(f'mercadolivre/next_page/{name}/hit')
+                # Promover a estratégia vencedora para a próxima página
+                self.next_page_strategies.remove(name)
+                self.next_page_strategies.insert(0, name)
+                self.logger.info(f"Próxima página encontrada ({name}): {next_page}")
                 return next_page
         
         self.logger.info("Nenhuma próxima página encontrada - fim da paginação")
         return None
+    
+    def next_page_from_json(self, response):
+        """Método 1: objeto next_page do estado JSON embutido no HTML"""
+        match = NEXT_PAGE_JSON.search(response.body)
+        if match:
+            return match.group(1).decode('utf-8').replace('\\u002F', '/')
+        return None
+    
+    def next_page_from_desde(self, response):
+        """Método 2: menor URL `_Desde_<offset>` posterior à página atual"""
+        current = DESDE_OFFSET.search(response.url.encode('utf-8'))
+        current_offset = int(current.group(1)) if current else 1
+        best = None
+        for match in NEXT_PAGE_DESDE.finditer(response.body):
+            offset = int(match.group(1))
+            if offset > current_offset and (best is None or offset < best[0]):
+                best = (offset, match.group(0))
+        return best[1].decode('utf-8') if best else None
+    
+    def next_page_from_pagination(self, response):
+        """Método 3: link "Seguinte" da paginação, testando NEXT_PAGE_XPATHS em ordem"""
+        root = response.selector.root
+        for xpath in NEXT_PAGE_XPATHS:
+            for href in xpath(root):
+                if href.strip():
+                    return href.strip()
+        return None
+    
+    def closed(self, reason):
+        if self.image_cache is not None:
+            self.image_cache.close()
+        stats = self.crawler.stats
+        for name in NEXT_PAGE_STRATEGIES:
+            tried = stats.get_value(f'mercadolivre/next_page/{name}/tried', 0)
+            if tried:
+                hits = stats.get_value(f'mercadolivre/next_page/{name}/hit', 0)
+                stats.set_value(f'mercadolivre/next_page/{name}/hit_rate', round(hits / tried, 3))
+
+
 #comando para rodar o spider: scrapy crawl mercadolivre -o data.csv para salvar em csv
+#comando para várias buscas: scrapy crawl mercadolivre -a queries_file=buscas.txt -a max_pages=10 -o data.csv
 #comando para rodar o spider: scrapy crawl mercadolivre -o data.json para salvar em json
 #comando para rodar o spider: scrapy crawl mercadolivre -o data.xml para salvar em xml
 #comando para rodar o spider: scrapy crawl mercadolivre -o data.jl para salvar em jsonlines
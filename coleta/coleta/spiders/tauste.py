@@ -4,9 +4,120 @@ Spider para coletar produtos do site Tauste
 """
 
 import scrapy
+import hashlib
+import json
+import math
 import re
-from urllib.parse import urljoin, urlparse
-from ..items import TausteItem
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
+
+from lxml import etree
+
+from ..brands import default_matcher
+from ..fallbacks import FallbackChain
+from ..items import TausteItem, parse_price_cents
+from ..textproducts import extract_text_products
+
+
+# Grade de produtos do Magento: <ol class="product-items"><li class="item product product-item">
+PRODUCT_ITEMS = etree.XPath(
+    '//li[contains(concat(" ", normalize-space(@class), " "), " product-item ")]'
+)
+# Toolbar: "Itens <span class="toolbar-number">1</span>-<span>24</span> de <span>187</span>"
+TOOLBAR_NUMBERS = etree.XPath(
+    '(//p[@id="toolbar-amount"])[1]//span[contains(@class, "toolbar-number")]/text()'
+)
+LIMITER_SELECTED = etree.XPath('(//select[@id="limiter"])[1]/option[@selected]/@value')
+
+# Campos de um card de produto: cada cadeia de seletores alternativos é um
+# único XPath avaliado uma vez por card (ver coleta.fallbacks)
+PRODUCT_FIELD_CHAINS = (
+    # Extrair título - baseado na estrutura do Tauste
+    FallbackChain('title', [
+        '.product-item-link::text',
+        '.product-name::text',
+        '.product-item-name::text',
+        'h2::text',
+        'h3::text',
+        'strong::text',
+        'b::text',
+        '.name::text',
+        '.title::text',
+        'a::text',
+    ]),
+    # Extrair preço - o primeiro texto com "R$"
+    FallbackChain('price', [
+        '.price::text',
+        '.product-price::text',
+        '.price-box .price::text',
+        '[class*="price"]::text',
+        'span:contains("R$")::text',
+        '.value::text',
+    ], accept=lambda value: 'R$' in value),
+    FallbackChain('description', [
+        '.description::text',
+        '.product-description::text',
+        '.short-description::text',
+        '.details::text',
+    ]),
+    FallbackChain('image_url', [
+        '.product-image img::attr(src)',
+        '.product-image-photo::attr(src)',
+        'img::attr(src)',
+        '.image::attr(src)',
+    ]),
+    FallbackChain('product_link', [
+        '.product-item-link::attr(href)',
+        '.product-name a::attr(href)',
+        'a::attr(href)',
+    ]),
+    # Código do produto (price-box do Magento)
+    FallbackChain('source_id', [
+        '[data-product-id]::attr(data-product-id)',
+    ]),
+    # Marca em elemento separado (senão, procurada no título)
+    FallbackChain('brand', [
+        '.brand::text',
+        '.manufacturer::text',
+        '.product-brand::text',
+    ]),
+)
+
+# API GraphQL do Magento (backend=graphql): categoria pelo url_path e produtos
+# paginados pelo uid da categoria, com páginas bem maiores que as do HTML
+GRAPHQL_CATEGORY_QUERY = ' '.join('''
+query ($path: String!) {
+  categoryList(filters: {url_path: {eq: $path}}) { uid name }
+}
+'''.split())
+GRAPHQL_PRODUCTS_QUERY = ' '.join('''
+query ($uid: String!, $pageSize: Int!, $currentPage: Int!) {
+  products(filter: {category_uid: {eq: $uid}}, pageSize: $pageSize, currentPage: $currentPage) {
+    total_count
+    page_info { current_page page_size total_pages }
+    items {
+      sku name url_key url_suffix
+      small_image { url }
+      price_range { minimum_price { final_price { value } } }
+    }
+  }
+}
+'''.split())
+GRAPHQL_PAGE_SIZE = 200
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+GRAPHQL_HEADERS = {
+    'User-Agent': REQUEST_HEADERS['User-Agent'],
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate, br',
+}
 
 
 class TausteSpider(scrapy.Spider):
@@ -20,82 +131,275 @@ class TausteSpider(scrapy.Spider):
     current_page = 0
     max_pages = None  # None = sem limite
     
-    def __init__(self, max_pages=None, *args, **kwargs):
+    def __init__(self, max_pages=None, backend='html', start_url=None, page_size=None, *args, **kwargs):
         super(TausteSpider, self).__init__(*args, **kwargs)
         if max_pages:
             self.max_pages = int(max_pages)
+        # backend=graphql: produtos pela API JSON do Magento, com o HTML
+        # como fallback se a API falhar para a categoria
+        self.backend = backend
+        self.page_size = int(page_size) if page_size else GRAPHQL_PAGE_SIZE
+        if start_url:
+            self.start_urls = [start_url]
+            self.allowed_domains = sorted(set(self.allowed_domains) | {urlsplit(start_url).hostname})
+        # Assinaturas das páginas já vistas: o Magento devolve a última
+        # página de novo para qualquer ?p= fora do intervalo
+        self.page_signatures = set()
+        # (campo, seletor) -> acertos; vai para as stats ao fechar o spider
+        self.selector_hits = Counter()
+        self.brand_matcher = default_matcher()
+    
+    async def start(self):
+        # O Scrapy 2.13+ só chama start(); start_requests() fica para versões anteriores
+        for request in self.start_requests():
+            yield request
     
     def start_requests(self):
         """Inicia as requisições com headers apropriados"""
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                },
-                callback=self.parse
-            )
+            if self.backend == 'graphql':
+                yield self.graphql_category_request(url)
+            else:
+                yield self.page_request(url, 1)
+    
+    def page_request(self, url, page, **meta):
+        return scrapy.Request(
+            url,
+            headers=REQUEST_HEADERS,
+            callback=self.parse,
+            meta={'page': page, **meta},
+        )
     
     def parse(self, response):
-        """Parse da página principal"""
-        self.current_page += 1
-        self.logger.info(f"🔍 Processando página {self.current_page}: {response.url}")
+        """Parse da página principal
+        
+        Na página 1 lê o total de itens e o tamanho da página na toolbar e
+        agenda todas as páginas restantes de uma vez; sem toolbar, segue
+        `?p=` em série. Uma página repetida encerra a paginação.
+        """
+        page = response.meta.get('page', 1)
+        self.current_page = page
+        self.logger.info(f"🔍 Processando página {page}: {response.url}")
         
         # Extrair produtos da página atual
         products = self.extract_products(response)
-        self.logger.info(f"📦 Encontrados {len(products)} produtos na página {self.current_page}")
+        self.logger.info(f"📦 Encontrados {len(products)} produtos na página {page}")
+        
+        if self.is_duplicate_page(products):
+            self.crawler.stats.inc_value('tauste/duplicate_pages')
+            self.logger.info(f"🏁 Página {page} repete uma página anterior - fim das páginas")
+            return
+        self.crawler.stats.inc_value('tauste/pages')
         
         # Yield dos produtos
         for product in products:
             yield product
         
+        # Páginas agendadas pelo fan-out não encadeiam a próxima
+        if response.meta.get('fanout'):
+            return
+        
+        if page == 1:
+            page_requests = list(self.fanout_pages(response, len(products)))
+            if page_requests:
+                yield from page_requests
+                return
+        
         # Verificar se há próxima página
-        next_page = self.get_next_page(response)
-        if next_page and (self.max_pages is None or self.current_page < self.max_pages):
+        next_page = self.get_next_page(response) if products else None
+        if next_page and (self.max_pages is None or page < self.max_pages):
             self.logger.info(f"➡️ Próxima página encontrada: {next_page}")
-            yield scrapy.Request(
-                next_page,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                },
-                callback=self.parse
-            )
+            yield self.page_request(next_page, page + 1)
         else:
-            if self.max_pages and self.current_page >= self.max_pages:
+            if self.max_pages and page >= self.max_pages:
                 self.logger.info(f"🏁 Limite de {self.max_pages} páginas atingido")
             else:
                 self.logger.info("🏁 Fim das páginas")
     
-    def extract_products(self, response):
-        """Extrai produtos da página"""
-        products = []
+    def fanout_pages(self, response, products_on_page):
+        """Agenda de uma vez as páginas 2..N a partir da toolbar da página 1"""
+        total, page_size = self.get_toolbar_counts(response)
+        page_size = page_size or products_on_page
+        if not total or not page_size:
+            self.logger.info("Toolbar sem total de itens - seguindo paginação em série")
+            return
         
-        # Baseado no conteúdo real do site, vou usar uma abordagem diferente
-        # O site parece ter produtos listados com números e preços
+        last_page = math.ceil(total / page_size)
+        if self.max_pages:
+            last_page = min(last_page, self.max_pages)
+        self.logger.info(f"📊 {total} itens, {page_size} por página: agendando páginas 2 a {last_page}")
         
-        # 1. Procurar por elementos que contenham preços (R$)
-        price_elements = response.css('*:contains("R$")')
-        self.logger.info(f"📋 Encontrados {len(price_elements)} elementos com preços")
+        for page in range(2, last_page + 1):
+            yield self.page_request(self.build_page_url(response.url, page), page, fanout=True)
+    
+    def get_toolbar_counts(self, response):
+        """(total de itens, itens por página) da toolbar do Magento"""
+        numbers = [
+            int(number) for number in
+            (re.sub(r'\D', '', text) for text in TOOLBAR_NUMBERS(response.selector.root))
+            if number
+        ]
+        if not numbers:
+            return None, None
+        total = numbers[-1]
         
-        if not price_elements:
-            self.logger.warning("⚠️ Nenhum preço encontrado na página")
-            return products
+        limiter = LIMITER_SELECTED(response.selector.root)
+        if limiter and limiter[0].isdigit():
+            page_size = int(limiter[0])
+        elif len(numbers) == 3:
+            # "Itens 1-24 de 187"
+            page_size = numbers[1] - numbers[0] + 1
+        else:
+            page_size = None
+        return total, page_size
+    
+    def is_duplicate_page(self, products):
+        """Verifica se a página traz exatamente os mesmos produtos de outra já vista"""
+        if not products:
+            return False
+        keys = '\x1f'.join(
+            f"{product.source_id or ''}|{product.product_link or product.title or ''}"
+            for product in products
+        )
+        signature = hashlib.sha1(keys.encode('utf-8')).digest()
+        if signature in self.page_signatures:
+            return True
+        self.page_signatures.add(signature)
+        return False
+    
+    def graphql_category_request(self, page_url):
+        """Request do uid da categoria da URL `/<loja>/<categoria>.html`"""
+        path = urlsplit(page_url).path.strip('/').split('/')
+        category_path = '/'.join(path[1:] if len(path) > 1 else path)
+        if category_path.endswith('.html'):
+            category_path = category_path[:-len('.html')]
+        return self.graphql_request(
+            page_url, GRAPHQL_CATEGORY_QUERY, {'path': category_path}, self.parse_graphql_category
+        )
+    
+    def graphql_request(self, page_url, query, variables, callback, **meta):
+        """GET no endpoint /graphql da loja (cabeçalho Store = código da loja na URL)"""
+        parts = urlsplit(page_url)
+        path = parts.path.strip('/').split('/')
+        headers = dict(GRAPHQL_HEADERS)
+        if len(path) > 1:
+            headers['Store'] = path[0]
+        params = urlencode({'query': query, 'variables': json.dumps(variables, separators=(',', ':'))})
+        return scrapy.Request(
+            urlunsplit((parts.scheme, parts.netloc, '/graphql', params, '')),
+            headers=headers,
+            callback=callback,
+            errback=self.graphql_failed,
+            meta={'page_url': page_url, **meta},
+        )
+    
+    def graphql_data(self, response):
+        """Campo `data` da resposta GraphQL, ou None se houver erros"""
+        try:
+            payload = json.loads(response.text)
+        except ValueError:
+            self.logger.warning(f"⚠️ Resposta GraphQL inválida: {response.url}")
+            return None
+        if payload.get('errors'):
+            self.logger.warning(f"⚠️ Erros GraphQL: {payload['errors'][0].get('message')}")
+            return None
+        return payload.get('data') or None
+    
+    def parse_graphql_category(self, response):
+        data = self.graphql_data(response)
+        categories = (data or {}).get('categoryList') or []
+        if not categories or not categories[0].get('uid'):
+            yield self.html_fallback(response.meta['page_url'], 'categoria não encontrada')
+            return
+        
+        category = categories[0]
+        yield self.graphql_products_request(
+            response.meta['page_url'], category['uid'], 1, category=category.get('name')
+        )
+    
+    def graphql_products_request(self, page_url, uid, page, **meta):
+        return self.graphql_request(
+            page_url,
+            GRAPHQL_PRODUCTS_QUERY,
+            {'uid': uid, 'pageSize': self.page_size, 'currentPage': page},
+            self.parse_graphql_products,
+            uid=uid, page=page, **meta,
+        )
+    
+    def parse_graphql_products(self, response):
+        """Itens de uma página da API; a página 1 agenda as demais de uma vez"""
+        page = response.meta['page']
+        page_url = response.meta['page_url']
+        products = ((self.graphql_data(response) or {}).get('products')) or None
+        if products is None:
+            if page == 1:
+                yield self.html_fallback(page_url, 'erro na consulta de produtos')
+            return
+        
+        self.crawler.stats.inc_value('tauste/graphql/pages')
+        parts = urlsplit(page_url)
+        store_path = parts.path.strip('/').split('/')
+        base = f"{parts.scheme}://{parts.netloc}/{store_path[0] + '/' if len(store_path) > 1 else ''}"
+        for product in products.get('items') or []:
+            price = (((product.get('price_range') or {}).get('minimum_price') or {}).get('final_price') or {}).get('value')
+            url_key = product.get('url_key')
+            yield TausteItem(
+                source_id=product.get('sku'),
+                title=product.get('name'),
+                brand=self.brand_matcher.find(product.get('name')),
+                price_cents=round(price * 100) if price is not None else None,
+                category=response.meta.get('category') or 'Padaria',
+                product_link=f"{base}{url_key}{product.get('url_suffix') or '.html'}" if url_key else None,
+                image_url=(product.get('small_image') or {}).get('url'),
+                page_number=page,
+                source_url=page_url,
+            )
+            self.crawler.stats.inc_value('tauste/graphql/items')
         
-        # 2. Procurar por títulos em negrito (strong, b)
-        bold_elements = response.css('strong, b')
-        self.logger.info(f"📋 Encontrados {len(bold_elements)} elementos em negrito")
+        if page != 1:
+            return
+        page_info = products.get('page_info') or {}
+        last_page = page_info.get('total_pages') or math.ceil((products.get('total_count') or 0) / self.page_size)
+        if self.max_pages:
+            last_page = min(last_page, self.max_pages)
+        self.logger.info(f"📊 {products.get('total_count')} itens na API: agendando páginas 2 a {last_page}")
+        for next_page in range(2, last_page + 1):
+            yield self.graphql_products_request(
+                page_url, response.meta['uid'], next_page, category=response.meta.get('category')
+            )
+    
+    def graphql_failed(self, failure):
+        """Erro de rede/HTTP na API: a categoria volta para o caminho HTML"""
+        request = failure.request
+        self.logger.warning(f"⚠️ Falha na API GraphQL ({failure.value!r})")
+        if request.meta.get('page', 1) == 1:
+            yield self.html_fallback(request.meta['page_url'], 'falha na requisição')
+    
+    def html_fallback(self, page_url, reason):
+        self.crawler.stats.inc_value('tauste/graphql/fallback')
+        self.logger.info(f"↩️ Usando as páginas HTML para {page_url} ({reason})")
+        return self.page_request(page_url, 1)
+    
+    def extract_products(self, response):
+        """Extrai produtos da página
         
-        # 3. Tentar extrair produtos por padrão
+        Caminho estruturado: cada `li.product-item` da grade do Magento vai
+        para extract_product_data, com consultas relativas ao próprio card
+        (nenhum predicado de texto sobre o documento inteiro). Sem a grade,
+        cai na extração por padrão sobre o texto da página.
+        """
+        products = []
+        
+        elements = PRODUCT_ITEMS(response.selector.root)
+        if elements:
+            self.logger.info(f"📋 Encontrados {len(elements)} cards de produto")
+            for element in elements:
+                item = self.extract_product_data(element, response)
+                if item is not None and (item.title or item.price_cents is not None):
+                    products.append(item)
+            return products
+        
+        # Sem a grade de produtos: tentar extrair por padrão
         # Baseado no conteúdo que vi, os produtos têm: número, título, preço
         product_data = self.extract_products_by_pattern(response)
         
@@ -106,74 +410,28 @@ class TausteSpider(scrapy.Spider):
         return products
     
     def extract_products_by_pattern(self, response):
-        """Extrai produtos baseado no padrão do site Tauste"""
+        """Extrai produtos baseado no padrão do site Tauste
+        
+        Padrão: número. código título **marca** R$ preço (ou a marca em
+        <strong>/<b>), reconhecido por um tokenizador de custo linear no
+        tamanho da página (coleta.textproducts).
+        """
         products = []
         
         try:
-            # Pegar todo o texto da página
-            page_text = response.text
-            
-            # Procurar por padrões de produtos
-            # Padrão: número. título **marca** preço R$ XX,XX
-            import re
-            
-            # Padrão para encontrar produtos
             # Exemplo: "1. 107484 Vinho Cartuxa Ea Tinto Seco Portugal Garrafa 750ml **Cartuxa** R$ 69,90"
-            product_pattern = r'(\d+)\.\s*(\d+)\s*(.*?)\s*\*\*(.*?)\*\*\s*R\$\s*([\d,]+)'
-            
-            matches = re.findall(product_pattern, page_text, re.DOTALL)
-            
-            for match in matches:
-                try:
-                    product_num = match[0]
-                    product_id = match[1]
-                    title = match[2].strip()
-                    brand = match[3].strip()
-                    price = f"R$ {match[4]}"
-                    
-                    # Criar item
-                    item = TausteItem()
-                    item['title'] = title
-                    item['price'] = price
-                    item['brand'] = brand
-                    item['description'] = f"Produto {product_id}"
-                    item['page_number'] = self.current_page
-                    item['source_url'] = response.url
-                    item['category'] = 'Padaria'
-                    
-                    products.append(item)
-                    
-                except Exception as e:
-                    self.logger.error(f"❌ Erro ao processar produto: {e}")
-                    continue
-            
-            # Se não encontrou com o padrão principal, tentar padrão mais simples
-            if not products:
-                # Padrão mais simples: título **marca** R$ preço
-                simple_pattern = r'(.*?)\s*\*\*(.*?)\*\*\s*R\$\s*([\d,]+)'
-                matches = re.findall(simple_pattern, page_text, re.DOTALL)
-                
-                for match in matches:
-                    try:
-                        title = match[0].strip()
-                        brand = match[1].strip()
-                        price = f"R$ {match[2]}"
-                        
-                        # Filtrar títulos muito curtos ou vazios
-                        if len(title) > 5:
-                            item = TausteItem()
-                            item['title'] = title
-                            item['price'] = price
-                            item['brand'] = brand
-                            item['page_number'] = self.current_page
-                            item['source_url'] = response.url
-                            item['category'] = 'Padaria'
-                            
-                            products.append(item)
-                    
-                    except Exception as e:
-                        self.logger.error(f"❌ Erro ao processar produto simples: {e}")
-                        continue
+            for product in extract_text_products(response.text):
+                item = TausteItem(
+                    source_id=product.product_id,
+                    title=product.title,
+                    brand=product.brand,
+                    price_cents=parse_price_cents(product.price),
+                    description=f"Produto {product.product_id}" if product.product_id else None,
+                    category='Padaria',
+                    page_number=self.current_page,
+                    source_url=response.url,
+                )
+                products.append(item)
             
         except Exception as e:
             self.logger.error(f"❌ Erro ao extrair produtos por padrão: {e}")
@@ -181,125 +439,37 @@ class TausteSpider(scrapy.Spider):
         return products
     
     def extract_product_data(self, element, response):
-        """Extrai dados de um produto individual"""
+        """Extrai dados de um produto individual (elemento lxml ou Selector do card)"""
         try:
-            # Extrair título - baseado na estrutura do Tauste
-            title_selectors = [
-                '.product-name::text',
-                '.product-item-name::text', 
-                'h2::text',
-                'h3::text',
-                'strong::text',
-                'b::text',
-                '.name::text',
-                '.title::text',
-                'a::text',
-            ]
+            fields = {}
+            for chain in PRODUCT_FIELD_CHAINS:
+                value, selector = chain(element)
+                self.selector_hits[(chain.field, selector or 'miss')] += 1
+                fields[chain.field] = value
             
-            title = None
-            for selector in title_selectors:
-                title = element.css(selector).get()
-                if title and title.strip():
-                    title = title.strip()
-                    break
+            for field in ('image_url', 'product_link'):
+                if fields[field]:
+                    fields[field] = urljoin(response.url, fields[field])
             
-            # Extrair preço - baseado na estrutura do Tauste
-            price_selectors = [
-                '.price::text',
-                '.product-price::text',
-                '.price-box .price::text',
-                '[class*="price"]::text',
-                'span:contains("R$")::text',
-                '.value::text',
-            ]
-            
-            price = None
-            for selector in price_selectors:
-                price = element.css(selector).get()
-                if price and 'R$' in price:
-                    price = price.strip()
-                    break
-            
-            # Extrair descrição
-            description_selectors = [
-                '.description::text',
-                '.product-description::text',
-                '.short-description::text',
-                '.details::text',
-            ]
-            
-            description = None
-            for selector in description_selectors:
-                description = element.css(selector).get()
-                if description and description.strip():
-                    description = description.strip()
-                    break
-            
-            # Extrair imagem
-            image_selectors = [
-                '.product-image img::attr(src)',
-                '.product-image-photo::attr(src)',
-                'img::attr(src)',
-                '.image::attr(src)',
-            ]
-            
-            image_url = None
-            for selector in image_selectors:
-                image_url = element.css(selector).get()
-                if image_url:
-                    image_url = urljoin(response.url, image_url)
-                    break
-            
-            # Extrair link do produto
-            link_selectors = [
-                '.product-item-link::attr(href)',
-                '.product-name a::attr(href)',
-                'a::attr(href)',
-            ]
-            
-            product_link = None
-            for selector in link_selectors:
-                product_link = element.css(selector).get()
-                if product_link:
-                    product_link = urljoin(response.url, product_link)
-                    break
-            
-            # Extrair marca (pode estar no título ou em elemento separado)
-            brand_selectors = [
-                '.brand::text',
-                '.manufacturer::text',
-                '.product-brand::text',
-            ]
-            
-            brand = None
-            for selector in brand_selectors:
-                brand = element.css(selector).get()
-                if brand and brand.strip():
-                    brand = brand.strip()
-                    break
-            
-            # Se não encontrou marca específica, tentar extrair do título
-            if not brand and title:
-                # Procurar por marcas conhecidas no título
-                known_brands = ['Tauste', 'Cartuxa', 'Don Luciano', 'Ceremony', 'Santa Carolina', 
-                               'Villa Fabrizia', 'Norton', 'Pata Negra', 'Mosketto', 'Perini', 
-                               'Quinta De Bons-Ventos', 'Zolla', 'Concha Y Toro', 'Casillero Del Diablo', 'Trivento']
-                for known_brand in known_brands:
-                    if known_brand.lower() in title.lower():
-                        brand = known_brand
-                        break
+            # Se não encontrou marca específica, procurar marcas conhecidas no título
+            if not fields['brand'] and fields['title']:
+                fields['brand'] = self.brand_matcher.find(fields['title'])
+                if fields['brand']:
+                    self.selector_hits[('brand', 'dictionary')] += 1
             
             # Criar item
-            item = TausteItem()
-            item['title'] = title
-            item['price'] = price
-            item['description'] = description
-            item['image_url'] = image_url
-            item['product_link'] = product_link
-            item['brand'] = brand
-            item['page_number'] = self.current_page
-            item['source_url'] = response.url
-            item['category'] = 'Padaria'  # Categoria fixa para este spider
+            item = TausteItem(
+                source_id=fields['source_id'],
+                title=fields['title'],
+                brand=fields['brand'],
+                price_cents=parse_price_cents(fields['price']),
+                description=fields['description'],
+                category='Padaria',  # Categoria fixa para este spider
+                product_link=fields['product_link'],
+                image_url=fields['image_url'],
+                page_number=self.current_page,
+                source_url=response.url,
+            )
             
             return item
             
@@ -310,23 +480,19 @@ class TausteSpider(scrapy.Spider):
     def get_next_page(self, response):
         """Extrai o link da próxima página"""
         # Padrão de URL do Tauste: ?p=2, ?p=3, etc.
-        current_url = response.url
-        
-        # Verificar se já tem parâmetro de página
-        if '?p=' in current_url:
-            # Extrair número da página atual
-            match = re.search(r'\?p=(\d+)', current_url)
-            if match:
-                current_page_num = int(match.group(1))
-                next_page_num = current_page_num + 1
-                next_url = re.sub(r'\?p=\d+', f'?p={next_page_num}', current_url)
-                return next_url
-        else:
-            # Primeira página, adicionar ?p=2
-            if '?' in current_url:
-                next_url = f"{current_url}&p=2"
-            else:
-                next_url = f"{current_url}?p=2"
-            return next_url
-        
-        return None 
\ No newline at end of file
+        page = response.meta.get('page', 1)
+        return self.build_page_url(response.url, page + 1)
+    
+    def build_page_url(self, url, page):
+        """Monta a URL `?p=<page>` preservando os demais parâmetros"""
+        parts = urlsplit(url)
+        query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'p']
+        if page > 1:
+            query.append(('p', str(page)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+    
+    def closed(self, reason):
+        # Acertos por seletor: alternativas que nunca acertam podem ser removidas
+        stats = self.crawler.stats
+        for (field, selector), hits in self.selector_hits.items():
+            stats.set_value(f'tauste/selector/{field}/{selector}', hits)
@@ -0,0 +1,199 @@
+"""
+Extração de produtos pelo padrão de texto "título **marca** R$ preço"
+
+Substitui as regexes DOTALL de TausteSpider.extract_products_by_pattern por
+um tokenizador de uma passada: cada caractere da página é consumido uma
+única vez (tags, texto, marcadores `**`), então o custo é linear no tamanho
+da página mesmo quando não há nenhum produto. A marca é o texto entre
+`**...**` ou dentro de `<strong>`/`<b>` (exceto o `<strong class="...name">`
+do nome do produto no Magento), o título é o último trecho de texto antes
+dela e o preço precisa vir logo depois, como em:
+
+    1. 107484 Vinho Cartuxa Ea Tinto Seco Portugal 750ml **Cartuxa** R$ 69,90
+    <a>Pão Francês Kg</a> <strong>Tauste</strong> <span>R$&nbsp;14,99</span>
+"""
+
+import re
+from collections import namedtuple
+from html import unescape
+
+
+# Tag (sem atravessar outro "<"), comentário, marcador de negrito, texto
+TOKEN = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)([^<>]*)>|<!--|\*\*|[^<*]+|[<*]')
+NAME_CLASS = re.compile(r'class\s*=\s*["\'][^"\']*name', re.I)
+PRICE = re.compile(r'\s*R\$\s*(\d[\d.]*(?:,\d{1,2})?)')
+# "1. 107484 Vinho ..." -> posição na lista, código do produto, título
+NUMBERED = re.compile(r'(\d+)\.\s*(\d+)\s+(\S.*)', re.S)
+
+BOLD_TAGS = {'strong', 'b'}
+RAW_TEXT_TAGS = {'script', 'style', 'textarea'}
+# Fechamento de cada tag de texto bruto, em qualquer caixa (</script>, </SCRIPT>, </Script>)
+RAW_TEXT_CLOSE = {tag: re.compile(f'</{tag}', re.I) for tag in RAW_TEXT_TAGS}
+# Marca/preço maiores que isso não são de um card de produto
+MAX_BRAND_CHARS = 120
+MAX_TITLE_CHARS = 300
+# Tags toleradas entre a marca e o preço (<span class="price-box"><span>...)
+MAX_PRICE_GAP = 8
+
+TextProduct = namedtuple('TextProduct', 'product_id title brand price')
+
+
+class _Scanner:
+    """Estado do tokenizador; `feed_*` recebem os tokens na ordem da página"""
+
+    def __init__(self):
+        self.products = []
+        self.text = []     # trechos do segmento de texto atual
+        self.title = ''    # último segmento de texto não vazio
+        self.bold = None   # trechos dentro do negrito (None = fora)
+        self.bold_size = 0
+        self.bold_is_name = False
+        self.brand = None  # marca aguardando o preço
+        self.price = None  # trechos depois da marca (None = não aguardando)
+        self.gap = 0       # tags vistas desde a marca
+
+    def feed_text(self, chunk):
+        if self.bold is not None:
+            self.bold.append(chunk)
+            self.bold_size += len(chunk)
+            if self.bold_size > MAX_BRAND_CHARS:
+                # Negrito longo demais (ou `**` sem par): volta a ser texto comum
+                self.text.extend(self.bold)
+                self.bold = None
+        elif self.price is not None:
+            self.price.append(chunk)
+            self.resolve_price(final=False)
+        else:
+            self.text.append(chunk)
+
+    def feed_boundary(self):
+        """Tag que não é de negrito: encerra o segmento de texto atual"""
+        if self.bold is not None:
+            return  # <strong><a>Marca</a></strong>
+        if self.price is not None:
+            self.gap += 1
+            if self.gap > MAX_PRICE_GAP:
+                self.abandon_price()
+            else:
+                self.resolve_price(final=True)
+        self.flush_text()
+
+    def open_bold(self, is_name=False):
+        if self.price is not None:
+            self.resolve_price(final=True)
+        self.flush_text()
+        self.bold = []
+        self.bold_size = 0
+        self.bold_is_name = is_name
+
+    def close_bold(self):
+        if self.bold is None:
+            return
+        brand = ' '.join(unescape(''.join(self.bold)).split())
+        self.bold = None
+        if brand and self.bold_is_name:
+            self.title = brand
+        elif brand and self.title:
+            self.brand = brand
+            self.price = []
+            self.gap = 0
+        elif brand:
+            self.title = brand
+
+    def toggle_bold(self):
+        if self.bold is None:
+            self.open_bold()
+        else:
+            self.close_bold()
+
+    def flush_text(self):
+        if self.text:
+            segment = ' '.join(unescape(''.join(self.text)).split())
+            self.text = []
+            if segment:
+                self.title = segment
+
+    def resolve_price(self, final):
+        """Confere se o texto depois da marca é o preço e emite o produto"""
+        pending = unescape(''.join(self.price))
+        match = PRICE.match(pending)
+        if match and (final or match.end() < len(pending)):
+            self.emit(match.group(1))
+            # O restante do trecho já é o começo do próximo produto
+            self.text = [pending[match.end():]]
+        elif match or pending.strip() in ('R', 'R$'):
+            self.price = [pending]  # preço ainda incompleto
+        elif not pending.strip():
+            self.price = []
+        else:
+            # Sem preço logo depois da marca: não era um produto
+            self.abandon_price()
+
+    def abandon_price(self):
+        pending = ''.join(self.price)
+        self.brand = None
+        self.price = None
+        self.text.append(pending)
+
+    def emit(self, price):
+        title, brand = self.title, self.brand
+        self.brand = None
+        self.price = None
+        self.title = ''
+        product_id = None
+        numbered = NUMBERED.match(title)
+        if numbered:
+            product_id, title = numbered.group(2), numbered.group(3).strip()
+        elif len(title) <= 5:
+            return  # títulos muito curtos ou vazios
+        if len(title) <= MAX_TITLE_CHARS:
+            self.products.append(TextProduct(product_id, title, brand, price))
+
+    def finish(self):
+        if self.bold is not None:
+            self.text.extend(self.bold)
+            self.bold = None
+        if self.price is not None:
+            self.resolve_price(final=True)
+        return self.products
+
+
+def extract_text_products(page):
+    """Lista de TextProduct(product_id, title, brand, price) encontrados em `page` (str)"""
+    scanner = _Scanner()
+    pos = 0
+    end = len(page)
+    while pos < end:
+        match = TOKEN.match(page, pos)
+        pos = match.end()
+        token = match.group(0)
+        tag = match.group(2)
+        if tag:
+            tag = tag.lower()
+            closing = match.group(1)
+            if tag in BOLD_TAGS:
+                if closing:
+                    scanner.close_bold()
+                else:
+                    scanner.open_bold(bool(NAME_CLASS.search(match.group(3))))
+                continue
+            scanner.feed_boundary()
+            if tag in RAW_TEXT_TAGS and not closing:
+                # Conteúdo de <script>/<style> não é texto da página
+                close = _find_close(page, tag, pos)
+                pos = end if close < 0 else close
+        elif token == '<!--':
+            close = page.find('-->', pos)
+            pos = end if close < 0 else close + 3
+            scanner.feed_boundary()
+        elif token == '**':
+            scanner.toggle_bold()
+        else:
+            scanner.feed_text(token)
+    return scanner.finish()
+
+
+def _find_close(page, tag, pos):
+    """Posição do `</tag` que fecha um elemento de texto bruto (ou -1)"""
+    match = RAW_TEXT_CLOSE[tag].search(page, pos)
+    return match.start() if match else -1
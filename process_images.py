@@ -4,94 +4,102 @@ Script para processar imagens base64 existentes no arquivo CSV
 e tentar obter imagens reais dos produtos
 """
 
+import argparse
 import csv
+import hashlib
+import json
 import os
 import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import requests
-import hashlib
-from urllib.parse import urlparse
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'coleta'))
+
+from coleta.imagestore import ImageStore
+from coleta.imageurls import ML_VARIANTS, canonicalize_image_url
+from coleta.placeholders import is_placeholder
+
+class Checkpoint:
+    """Manifesto de progresso gravado ao lado do CSV de saída
+    
+    Guarda quantas linhas da entrada já foram escritas, um digest dessas
+    linhas e o tamanho da saída naquele ponto. Na retomada o prefixo da
+    entrada é conferido e linhas escritas depois do último checkpoint são
+    descartadas antes de anexar, então um export que só cresceu continua de
+    onde parou sem duplicar linhas.
+    """
+    
+    def __init__(self, output_file):
+        self.path = output_file + '.checkpoint.json'
+    
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, rows_done, digest, fieldnames, output_size):
+        state = {
+            'rows_done': rows_done,
+            'digest': digest,
+            'fieldnames': fieldnames,
+            'output_size': output_size,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
 
 class ImageProcessor:
-    def __init__(self):
+    def __init__(self, workers=1, checkpoint_every=25, variant=None):
         self.images_dir = 'images'
+        self.workers = workers
+        self.variant = variant
+        self.checkpoint_every = checkpoint_every
         self.base64_pattern = re.compile(r'^data:image/[^;]+;base64,')
+        self.store = ImageStore(self.images_dir)
         
-        # Criar diretório de imagens se não existir
-        if not os.path.exists(self.images_dir):
-            os.makedirs(self.images_dir)
-    
-    def is_base64_placeholder(self, url):
-        """Verifica se é um placeholder base64"""
-        if not url:
-            return True
-        
-        if url.startswith('data:image/'):
-            placeholder_patterns = [
-                'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7',
-                'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
-            ]
-            return any(pattern in url for pattern in placeholder_patterns)
-        
-        return False
+        # Sessão compartilhada: conexões keep-alive reaproveitadas por todos os workers
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def download_image(self, url, title):
-        """Baixa a imagem da URL e salva localmente"""
+        """Baixa a imagem da URL e salva no ImageStore"""
+        url = canonicalize_image_url(url, self.variant)
         try:
-            filename = self.create_filename(url, title)
-            filepath = os.path.join(self.images_dir, filename)
-            
-            if os.path.exists(filepath):
+            filepath = self.store.cached(url)
+            if filepath:
                 return filepath
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
+            headers = self.store.conditional_headers(url)
+            response = self.session.get(url, headers=headers, timeout=30)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status_code == 304:
+                return self.store.not_modified(url, etag, last_modified)
             response.raise_for_status()
             
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            return filepath
+            return self.store.put(url, response.content, etag, last_modified)
             
         except Exception as e:
             print(f"Erro ao baixar imagem {url}: {str(e)}")
             return None
     
-    def create_filename(self, url, title):
-        """Cria um nome de arquivo único para a imagem"""
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        extension = os.path.splitext(path)[1]
-        
-        if not extension:
-            if 'webp' in url.lower():
-                extension = '.webp'
-            elif 'jpg' in url.lower() or 'jpeg' in url.lower():
-                extension = '.jpg'
-            elif 'png' in url.lower():
-                extension = '.png'
-            else:
-                extension = '.jpg'
-        
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
-        safe_title = safe_title[:50]
-        
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-        
-        return f"{safe_title}_{url_hash}{extension}"
-    
     def get_real_image_from_product_page(self, product_url, title):
         """Tenta obter imagem real da página do produto"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(product_url, headers=headers, timeout=30)
+            response = self.session.get(product_url, timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -109,10 +117,8 @@ class ImageProcessor:
                 img = soup.select_one(selector)
                 if img:
                     src = img.get('src') or img.get('data-src')
-                    if src and not self.is_base64_placeholder(src):
-                        # Limpar URL
-                        clean_url = self.clean_image_url(src)
-                        return clean_url
+                    if src and not is_placeholder(src):
+                        return canonicalize_image_url(src, self.variant)
             
             return None
             
@@ -120,83 +126,176 @@ class ImageProcessor:
             print(f"Erro ao obter imagem da página {product_url}: {str(e)}")
             return None
     
-    def clean_image_url(self, url):
-        """Remove parâmetros de redimensionamento da URL"""
-        if not url:
-            return url
+    def process_row(self, row):
+        """Resolve a imagem de uma linha do CSV e devolve a linha preenchida"""
+        image_url = row.get('image_url') or row.get('image', '')
+        title = row.get('title') or 'Sem título'
+        link = row.get('link', '')
+        
+        # Linha já resolvida em uma execução anterior: nada a buscar
+        if row.get('image_path') and os.path.exists(row['image_path']):
+            row['is_base64'] = 'False'
+            row.setdefault('real_image_url', image_url)
+            return row
         
-        url = re.sub(r'[?&]w=\d+', '', url)
-        url = re.sub(r'[?&]h=\d+', '', url)
-        url = re.sub(r'[?&]size=\d+', '', url)
-        url = re.sub(r'[?&]quality=\d+', '', url)
-        url = re.sub(r'[?&]D_Q_NP_\d+', '', url)
-        url = re.sub(r'[?&]+$', '', url)
+        # Verificar se é base64
+        if is_placeholder(image_url):
+            row['is_base64'] = 'True'
+            row['image_path'] = ''
+            row['real_image_url'] = ''
+            
+            # Tentar obter imagem real da página do produto
+            if link:
+                print(f"Tentando obter imagem real para: {title}")
+                real_image_url = self.get_real_image_from_product_page(link, title)
+                if real_image_url:
+                    row['real_image_url'] = real_image_url
+                    # Baixar a imagem
+                    image_path = self.download_image(real_image_url, title)
+                    if image_path:
+                        row['image_path'] = image_path
+                        print(f"Imagem baixada: {image_path}")
+        else:
+            row['is_base64'] = 'False'
+            row['real_image_url'] = image_url
+            # Baixar a imagem existente
+            image_path = self.download_image(image_url, title)
+            row['image_path'] = image_path if image_path else ''
         
-        return url
+        return row
     
-    def process_csv(self, input_file, output_file):
-        """Processa o arquivo CSV e tenta obter imagens reais"""
-        processor = ImageProcessor()
+    def process_csv(self, input_file, output_file, resume=True):
+        """Processa o arquivo CSV e tenta obter imagens reais
+        
+        Com mais de um worker as linhas são resolvidas em paralelo, mas
+        escritas na ordem de entrada. O progresso vai para um checkpoint a
+        cada `checkpoint_every` linhas; com `resume` uma execução interrompida
+        continua anexando à saída. Retorna o número de linhas processadas.
+        """
+        checkpoint = Checkpoint(output_file)
+        with open(input_file, 'r', encoding='utf-8') as infile:
+            input_fields = list(csv.DictReader(infile).fieldnames)
+        
+        skip = 0
+        state = checkpoint.load() if resume and os.path.exists(output_file) else None
+        if state and os.path.getsize(output_file) >= state.get('output_size', -1):
+            skip = self._resume_offset(input_file, input_fields, state)
+        if skip:
+            print(f"Retomando a partir da linha {skip + 1} (checkpoint {checkpoint.path})")
+            # Descartar linhas escritas depois do último checkpoint
+            with open(output_file, 'r+b') as f:
+                f.truncate(state['output_size'])
+        
+        fieldnames = list(input_fields)
+        for field in ('image_path', 'is_base64', 'real_image_url'):
+            if field not in fieldnames:
+                fieldnames.append(field)
         
         with open(input_file, 'r', encoding='utf-8') as infile, \
-             open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+             open(output_file, 'a' if skip else 'w', encoding='utf-8', newline='') as outfile:
             
             reader = csv.DictReader(infile)
-            fieldnames = reader.fieldnames + ['image_path', 'is_base64', 'real_image_url']
             writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
+            if not skip:
+                writer.writeheader()
+            
+            # O digest cobre as linhas de entrada já escritas na saída
+            digest = hashlib.sha1()
+            for row in islice(reader, skip):
+                digest.update(self._row_key(row, input_fields))
+            
+            keys = deque()
+            def tracked(rows):
+                for row in rows:
+                    keys.append(self._row_key(row, input_fields))
+                    yield row
             
-            for row in reader:
-                image_url = row.get('image', '')
-                title = row.get('title', 'Sem título')
-                link = row.get('link', '')
-                
-                # Verificar se é base64
-                if processor.is_base64_placeholder(image_url):
-                    row['is_base64'] = 'True'
-                    row['image_path'] = ''
-                    
-                    # Tentar obter imagem real da página do produto
-                    if link:
-                        print(f"Tentando obter imagem real para: {title}")
-                        real_image_url = processor.get_real_image_from_product_page(link, title)
-                        if real_image_url:
-                            row['real_image_url'] = real_image_url
-                            # Baixar a imagem
-                            image_path = processor.download_image(real_image_url, title)
-                            if image_path:
-                                row['image_path'] = image_path
-                                print(f"Imagem baixada: {image_path}")
-                            else:
-                                row['image_path'] = ''
-                        else:
-                            row['real_image_url'] = ''
-                            row['image_path'] = ''
-                    else:
-                        row['real_image_url'] = ''
-                        row['image_path'] = ''
-                else:
-                    row['is_base64'] = 'False'
-                    row['real_image_url'] = image_url
-                    # Baixar a imagem existente
-                    image_path = processor.download_image(image_url, title)
-                    row['image_path'] = image_path if image_path else ''
-                
+            done = skip
+            count = 0
+            for row in self._process_rows(tracked(reader)):
                 writer.writerow(row)
+                digest.update(keys.popleft())
+                done += 1
+                count += 1
+                if count % self.checkpoint_every == 0:
+                    self._save_checkpoint(checkpoint, outfile, done, digest, input_fields)
+            
+            self._save_checkpoint(checkpoint, outfile, done, digest, input_fields)
+        
+        return count
+    
+    def _save_checkpoint(self, checkpoint, outfile, done, digest, input_fields):
+        outfile.flush()
+        output_size = os.fstat(outfile.fileno()).st_size
+        checkpoint.save(done, digest.hexdigest(), input_fields, output_size)
+    
+    def _resume_offset(self, input_file, input_fields, state):
+        """Quantas linhas da entrada podem ser puladas segundo o checkpoint"""
+        if not state or state.get('fieldnames') != input_fields:
+            return 0
+        
+        rows_done = state['rows_done']
+        digest = hashlib.sha1()
+        seen = 0
+        with open(input_file, 'r', encoding='utf-8') as infile:
+            for row in islice(csv.DictReader(infile), rows_done):
+                digest.update(self._row_key(row, input_fields))
+                seen += 1
+        
+        # Entrada diferente da que gerou o checkpoint: recomeçar do zero
+        if seen != rows_done or digest.hexdigest() != state['digest']:
+            return 0
+        return rows_done
+    
+    def _row_key(self, row, fieldnames):
+        return ('\x1f'.join(row.get(field) or '' for field in fieldnames) + '\x1e').encode('utf-8')
+    
+    def _process_rows(self, rows):
+        """Processa as linhas com o pool de workers, preservando a ordem"""
+        if self.workers <= 1:
+            for row in rows:
+                yield self.process_row(row)
+            return
+        
+        # Janela limitada de futures: memória constante mesmo em CSVs grandes
+        window = self.workers * 4
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for row in rows:
+                pending.append(executor.submit(self.process_row, row))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
 
 def main():
-    processor = ImageProcessor()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--input', default='coleta/data.csv', help='CSV gerado pelo spider')
+    parser.add_argument('--output', default='coleta/data_processed.csv', help='CSV de saída')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Linhas processadas em paralelo (páginas e imagens)')
+    parser.add_argument('--variant', choices=sorted(ML_VARIANTS),
+                        help='Variante de tamanho das imagens do mlstatic (padrão: a do CSV)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignora o checkpoint e reprocessa todas as linhas')
+    args = parser.parse_args()
+    
+    processor = ImageProcessor(workers=args.workers, variant=args.variant)
     
     # Processar o arquivo CSV existente
-    input_file = 'coleta/data.csv'
-    output_file = 'coleta/data_processed.csv'
+    input_file = args.input
+    output_file = args.output
     
     if os.path.exists(input_file):
         print("Processando arquivo CSV...")
-        processor.process_csv(input_file, output_file)
+        start = time.monotonic()
+        count = processor.process_csv(input_file, output_file, resume=not args.restart)
+        elapsed = time.monotonic() - start
         print(f"Arquivo processado salvo como: {output_file}")
+        print(f"{count} linhas em {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f} linhas/s, {args.workers} workers)")
+        print(f"Cache de imagens: {processor.store.summary()}")
     else:
         print(f"Arquivo {input_file} não encontrado!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
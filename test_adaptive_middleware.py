@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Testes do controle adaptativo (AIMD) do ColetaDownloaderMiddleware
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.settings.default_settings import TWISTED_REACTOR
+from scrapy.utils.reactor import install_reactor, is_reactor_installed
+from scrapy.utils.test import get_crawler
+
+from coleta.middlewares import ColetaDownloaderMiddleware
+
+
+HOST = 'loja.example'
+SETTINGS = {
+    'ADAPTIVE_ENABLED': True,
+    'ADAPTIVE_MIN_CONCURRENCY': 1,
+    'ADAPTIVE_MAX_CONCURRENCY': 8,
+    'ADAPTIVE_MIN_DELAY': 0,
+    'ADAPTIVE_MAX_DELAY': 30,
+    'ADAPTIVE_COOLDOWN': 0,
+}
+
+
+def create_middleware(concurrency=4, delay=0.0, **settings):
+    """Middleware com um slot de download falso (só concurrency/delay)"""
+    if not is_reactor_installed():
+        install_reactor(TWISTED_REACTOR)
+    crawler = get_crawler(settings_dict={**SETTINGS, **settings})
+    slot = SimpleNamespace(concurrency=concurrency, delay=delay)
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={HOST: slot}))
+    return ColetaDownloaderMiddleware(crawler), slot
+
+
+def respond(middleware, status=200, latency=0.05, url=f'https://{HOST}/busca'):
+    request = Request(url, meta={'download_slot': HOST, 'download_latency': latency})
+    response = HtmlResponse(url, status=status, body=b'<html></html>', request=request)
+    return middleware.process_response(request, response, None)
+
+
+def test_healthy_window_halves_delay_then_raises_concurrency():
+    middleware, slot = create_middleware(concurrency=2, delay=1.0)
+    # Uma janela = `concurrency` respostas saudáveis por passo
+    for _ in range(2):
+        respond(middleware)
+    assert slot.delay == 0.5
+    for _ in range(2):
+        respond(middleware)
+    assert slot.delay == 0.25
+    # 0.25 -> 0.125 -> 0.0625 -> 0 (abaixo de 100 ms vai direto ao mínimo)
+    for _ in range(2 * 3):
+        respond(middleware)
+    assert slot.delay == 0
+    assert slot.concurrency == 2
+    # Com o delay no mínimo, a próxima janela sobe a concurrency
+    for _ in range(2):
+        respond(middleware)
+    assert slot.concurrency == 3
+    assert middleware.stats.get_value(f'adaptive/{HOST}/concurrency') == 3
+
+
+def test_concurrency_stops_at_max():
+    middleware, slot = create_middleware(concurrency=7)
+    for _ in range(200):
+        respond(middleware)
+    assert slot.concurrency == 8
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_throttle_status_halves_concurrency(status):
+    middleware, slot = create_middleware(concurrency=8)
+    respond(middleware, status=status)
+    assert slot.concurrency == 4
+    respond(middleware, status=status)
+    assert slot.concurrency == 2
+    assert middleware.stats.get_value(f'adaptive/{HOST}/backoff/{status}') == 2
+
+
+def test_throttle_at_min_concurrency_doubles_delay():
+    middleware, slot = create_middleware(concurrency=1, delay=0.0)
+    respond(middleware, status=429)
+    assert slot.delay == 0.25
+    respond(middleware, status=429)
+    assert slot.delay == 0.5
+    for _ in range(10):
+        respond(middleware, status=429)
+    assert slot.delay == 30  # ADAPTIVE_MAX_DELAY
+
+
+def test_cooldown_allows_one_backoff_and_no_increase():
+    middleware, slot = create_middleware(concurrency=8, ADAPTIVE_COOLDOWN=60)
+    for _ in range(3):
+        respond(middleware, status=503)
+    assert slot.concurrency == 4
+    assert middleware.stats.get_value(f'adaptive/{HOST}/backoff/503') == 3
+    # Durante o cooldown as respostas saudáveis não sobem a concurrency
+    for _ in range(20):
+        respond(middleware)
+    assert slot.concurrency == 4
+
+
+def test_blocked_page_backs_off():
+    middleware, slot = create_middleware(concurrency=4)
+    respond(middleware, url=f'https://{HOST}/gz/account-verification?go=1')
+    assert slot.concurrency == 2
+    assert middleware.stats.get_value(f'adaptive/{HOST}/backoff/blocked') == 1
+
+
+def test_low_latency_jitter_never_backs_off():
+    # Servidor local: ~1 ms com picos de 20x, tudo abaixo de ADAPTIVE_LATENCY_FLOOR
+    middleware, slot = create_middleware(concurrency=4)
+    for n in range(300):
+        respond(middleware, latency=0.02 if n % 7 == 0 else 0.001)
+    assert not middleware.stats.get_value(f'adaptive/{HOST}/backoff/latency')
+    assert slot.concurrency == 8
+
+
+def test_single_slow_response_does_not_back_off():
+    middleware, slot = create_middleware(concurrency=4, ADAPTIVE_COOLDOWN=0)
+    for _ in range(20):
+        respond(middleware, latency=0.3)
+    respond(middleware, latency=3.0)
+    for _ in range(20):
+        respond(middleware, latency=0.3)
+    assert not middleware.stats.get_value(f'adaptive/{HOST}/backoff/latency')
+
+
+def test_sustained_slowdown_backs_off():
+    middleware, slot = create_middleware(concurrency=4, ADAPTIVE_MAX_CONCURRENCY=4)
+    for _ in range(20):
+        respond(middleware, latency=0.3)
+    for _ in range(10):
+        respond(middleware, latency=2.0)
+    assert middleware.stats.get_value(f'adaptive/{HOST}/backoff/latency') >= 1
+    assert slot.concurrency < 4
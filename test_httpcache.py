@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Testes do SqliteCacheStorage (cache HTTP em SQLite)
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.settings.default_settings import TWISTED_REACTOR
+from scrapy.utils.reactor import install_reactor, is_reactor_installed
+from scrapy.utils.test import get_crawler
+
+from coleta.httpcache import SqliteCacheStorage
+
+
+BODY = '<html><body><h1>Padaria</h1></body></html>'.encode('utf-8')
+
+
+def open_storage(cachedir, **settings):
+    """Storage aberto para um spider 'tauste' com o cache em `cachedir`"""
+    if not is_reactor_installed():
+        install_reactor(TWISTED_REACTOR)
+    crawler = get_crawler(Spider, settings_dict={'HTTPCACHE_DIR': cachedir, **settings})
+    spider = Spider.from_crawler(crawler, name='tauste')
+    storage = SqliteCacheStorage(crawler.settings)
+    storage.open_spider(spider)
+    return storage, spider
+
+
+def store(storage, spider, url, body=BODY, status=200):
+    request = Request(url)
+    response = HtmlResponse(
+        url, status=status, body=body, request=request,
+        headers={'Content-Type': 'text/html; charset=utf-8', 'ETag': '"abc"'},
+    )
+    storage.store_response(spider, request, response)
+    return request
+
+
+def test_store_and_retrieve_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage, spider = open_storage(tmp)
+        request = store(storage, spider, 'https://tauste.com.br/padaria.html', status=203)
+        cached = storage.retrieve_response(spider, request)
+        assert cached.url == request.url
+        assert cached.status == 203
+        assert cached.body == BODY
+        assert cached.headers.get('ETag') == b'"abc"'
+        assert isinstance(cached, HtmlResponse)
+        assert storage.retrieve_response(spider, Request('https://tauste.com.br/outra.html')) is None
+        storage.close_spider(spider)
+
+
+def test_identical_bodies_stored_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage, spider = open_storage(tmp)
+        first = store(storage, spider, 'https://tauste.com.br/padaria.html')
+        second = store(storage, spider, 'https://tauste.com.br/padaria.html?p=1')
+        store(storage, spider, 'https://tauste.com.br/bebidas.html', body=b'<html>outra</html>')
+        assert storage.db.execute('SELECT COUNT(*) FROM responses').fetchone()[0] == 3
+        assert storage.db.execute('SELECT COUNT(*) FROM bodies').fetchone()[0] == 2
+        assert storage.retrieve_response(spider, second).body == BODY
+        assert storage.retrieve_response(spider, first).body == BODY
+        storage.close_spider(spider)
+
+
+def test_readonly_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage, spider = open_storage(tmp)
+        request = store(storage, spider, 'https://tauste.com.br/padaria.html')
+        storage.close_spider(spider)
+        # close_spider incorpora o WAL: o replay lê um único arquivo
+        assert os.listdir(tmp) == ['tauste.sqlite']
+
+        replay, spider = open_storage(tmp, HTTPCACHE_SQLITE_READONLY=True)
+        assert replay.retrieve_response(spider, request).body == BODY
+        # READONLY: gravações são ignoradas
+        missing = store(replay, spider, 'https://tauste.com.br/nova.html')
+        assert replay.retrieve_response(spider, missing) is None
+        replay.close_spider(spider)
+
+
+def test_readonly_without_cache_file_logs_error(caplog):
+    with tempfile.TemporaryDirectory() as tmp:
+        storage, spider = open_storage(tmp, HTTPCACHE_SQLITE_READONLY=True)
+        assert storage.retrieve_response(spider, Request('https://tauste.com.br/padaria.html')) is None
+        storage.close_spider(spider)
+        assert not os.listdir(tmp)
+    assert 'tauste.sqlite' in caplog.text
+    assert 'não existe' in caplog.text
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Testes do ImageStore (imagens endereçadas por conteúdo + índice SQLite)
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from coleta.imagestore import ImageStore
+
+
+URL = 'https://http2.mlstatic.com/D_Q_NP_2X_123-E.webp'
+DATA = b'RIFF\x00\x00\x00\x00WEBPVP8 ' + bytes(range(256)) * 4
+
+
+def test_lookup_returns_indexed_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        path = store.put(URL, DATA)
+        assert path.endswith('.webp')
+        assert store.lookup(URL) == path
+        assert store.lookup('https://http2.mlstatic.com/outra.webp') is None
+        store.close()
+
+
+def test_lookup_drops_row_of_deleted_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        path = store.put(URL, DATA)
+        os.remove(path)
+        assert store.lookup(URL) is None
+        assert store.stats['stale'] == 1
+        assert store._entry(URL) is None
+        # O próximo download regrava o arquivo no mesmo caminho
+        assert store.put(URL, DATA) == path
+        assert os.path.exists(path)
+        store.close()
+
+
+def test_known_image_needs_no_request_on_next_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        path = store.put(URL, DATA, etag='"v1"')
+        store.close()
+        # Nova execução: dentro da janela padrão (24 h) nem revalida
+        store = ImageStore(tmp)
+        assert store.cached(URL) == path
+        assert store.stats['hit'] == 1 and store.stats['revalidated'] == 0
+        store.close()
+        # Com revalidate_after=0 toda execução manda o request condicional
+        store = ImageStore(tmp, revalidate_after=0)
+        assert store.cached(URL) is None
+        store.close()
+
+
+def test_deleted_file_is_not_revalidated():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp, revalidate_after=3600)
+        path = store.put(URL, DATA, etag='"v1"')
+        assert store.cached(URL) == path
+        os.remove(path)
+        # Sem arquivo não há cópia para um 304 validar: download completo
+        assert store.cached(URL) is None
+        assert store.conditional_headers(URL) == {}
+        assert store.not_modified(URL, '"v1"') is None
+        assert store.stats['revalidated'] == 0
+        store.close()
+
+
+def test_not_modified_keeps_existing_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        path = store.put(URL, DATA, etag='"v1"')
+        assert store.conditional_headers(URL) == {'If-None-Match': '"v1"'}
+        assert store.not_modified(URL, '"v2"') == path
+        assert store.conditional_headers(URL) == {'If-None-Match': '"v2"'}
+        assert store.stats['revalidated'] == 1
+        store.close()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Testes do IncrementalPipeline (modo incremental)
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from scrapy import Spider
+from scrapy.settings.default_settings import TWISTED_REACTOR
+from scrapy.utils.reactor import install_reactor, is_reactor_installed
+from scrapy.utils.test import get_crawler
+
+from coleta.items import ColetaItem
+from coleta.pipelines import IncrementalPipeline
+
+
+LINK = 'https://produto.mercadolivre.com.br/MLB-123-tenis-_JM'
+
+
+def create_pipeline(tmp):
+    if not is_reactor_installed():
+        install_reactor(TWISTED_REACTOR)
+    crawler = get_crawler(Spider, settings_dict={'INCREMENTAL_ENABLED': True})
+    spider = Spider.from_crawler(crawler, name='mercadolivre')
+    return IncrementalPipeline(os.path.join(tmp, 'seen.sqlite'), crawler), spider
+
+
+def crawl_once(pipeline, spider, item):
+    item = pipeline.process_item(item, spider)
+    pipeline.item_scraped(item, spider)
+    return item
+
+
+def test_items_without_source_id_count_as_new():
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline, spider = create_pipeline(tmp)
+        item = pipeline.process_item(ColetaItem(), spider)
+        assert item.crawl_status == 'new'
+        assert pipeline.crawler.stats.get_value('incremental/new') == 1
+        pipeline.close_spider(spider)
+
+
+def test_unchanged_item_reuses_existing_image():
+    with tempfile.TemporaryDirectory() as tmp:
+        image = os.path.join(tmp, 'foto.webp')
+        with open(image, 'wb') as f:
+            f.write(b'RIFF')
+        pipeline, spider = create_pipeline(tmp)
+        crawl_once(pipeline, spider, ColetaItem(title='Tênis', link=LINK, image_path=image))
+        item = crawl_once(pipeline, spider, ColetaItem(title='Tênis', link=LINK))
+        assert item.crawl_status == 'unchanged'
+        assert item.image_path == image
+        pipeline.close_spider(spider)
+
+
+def test_unchanged_item_with_deleted_image_is_fetched_again():
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline, spider = create_pipeline(tmp)
+        missing = os.path.join(tmp, 'apagada.webp')
+        crawl_once(pipeline, spider, ColetaItem(title='Tênis', link=LINK, image_path=missing))
+        item = crawl_once(pipeline, spider, ColetaItem(title='Tênis', link=LINK))
+        assert item.crawl_status == 'unchanged'
+        assert item.image_path is None
+        assert pipeline.crawler.stats.get_value('incremental/image_missing') == 1
+        pipeline.close_spider(spider)
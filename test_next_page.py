@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Testes offline da paginação do MercadolivreSpider (links e fan-out)
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from scrapy.http import HtmlResponse
+
+from coleta.spiders.mercadolivre import MAX_RESULTS_OFFSET, MercadolivreSpider
+
+
+URL = 'https://lista.mercadolivre.com.br/tenis-corrida-masculino'
+
+
+def next_page(body):
+    response = HtmlResponse(URL, body=f'<html><body>{body}</body></html>'.encode('utf-8'))
+    return MercadolivreSpider().next_page_from_pagination(response)
+
+
+def test_pagination_component_link():
+    assert next_page(
+        '<ul class="andes-pagination">'
+        '<li><a class="andes-pagination__link" href="/p1">1</a></li>'
+        '<li><a class="andes-pagination__link" aria-label="Seguinte" href="/p2">Seguinte</a></li>'
+        '</ul>'
+    ) == '/p2'
+
+
+def test_plain_text_anchor_fallback():
+    assert next_page('<a href="/p1">Anterior</a> <a href="/p2"> Seguinte </a>') == '/p2'
+
+
+def test_aria_label_anchor_without_pagination_class():
+    assert next_page('<nav><a aria-label="Próxima página" href="/p2">›</a></nav>') == '/p2'
+
+
+def test_priority_beats_document_order():
+    # Um "Next" genérico antes da paginação não pode vencer o link do componente
+    assert next_page(
+        '<a href="/blog">Next article</a>'
+        '<a data-testid="pagination-next" href="/p3">›</a>'
+        '<a class="andes-pagination__link" aria-label="Seguinte" href="/p2">›</a>'
+    ) == '/p2'
+    # Mesma ordem do código original: texto genérico antes do botão --next
+    assert next_page(
+        '<a href="/blog">Next article</a>'
+        '<li class="andes-pagination__button--next"><a href="/p2">›</a></li>'
+    ) == '/blog'
+
+
+def test_no_next_link():
+    assert next_page('<a href="/p1">Anterior</a>') is None
+
+
+def fanout_offsets(total, limit, max_pages=None):
+    state = f'<script>{{"paging":{{"total":{total},"offset":0,"limit":{limit}}}}}</script>'
+    response = HtmlResponse(URL, body=f'<html><body>{state}</body></html>'.encode('utf-8'))
+    requests = MercadolivreSpider().fanout_pages(response, limit, max_pages=max_pages)
+    return [int(request.url.split('_Desde_')[1].split('_')[0]) for request in requests]
+
+
+def test_fanout_stops_at_max_offset():
+    offsets = fanout_offsets(total=250_000, limit=48)
+    assert len(offsets) == MAX_RESULTS_OFFSET // 48
+    assert offsets[-1] <= MAX_RESULTS_OFFSET
+    assert offsets[-1] + 48 > MAX_RESULTS_OFFSET
+
+
+def test_fanout_page_size_dividing_max_offset():
+    # 50 por página: a página 41 seria _Desde_2001, além do limite
+    offsets = fanout_offsets(total=250_000, limit=50)
+    assert offsets[-1] == 1951
+    assert len(offsets) == 39
+
+
+def test_fanout_small_search_and_max_pages():
+    assert fanout_offsets(total=100, limit=48) == [49, 97]
+    assert fanout_offsets(total=250_000, limit=48, max_pages=3) == [49, 97]
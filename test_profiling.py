@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Testes do ProfilingExtension: crawl completo do TausteSpider contra o
+servidor local (benchmarks/standin.py) com PROFILING_ENABLED
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from standin import StandInServer
+
+
+TOTAL = 187
+
+# Roda o crawl no subprocesso e imprime as stats finais em JSON
+CRAWL_SCRIPT = '''
+import json, sys
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+settings = get_project_settings()
+settings.setdict(json.loads(sys.argv[1]), priority='cmdline')
+process = CrawlerProcess(settings)
+crawler = process.create_crawler('tauste')
+process.crawl(crawler, **json.loads(sys.argv[2]))
+process.start()
+print(json.dumps(crawler.stats.get_stats(), default=str))
+'''
+
+
+def crawl(server, tmp, **settings):
+    """Roda `tauste` contra o servidor local e devolve (stats, itens exportados)"""
+    output = os.path.join(tmp, 'items.jl')
+    settings = {
+        'IMAGES_STORE': os.path.join(tmp, 'images'),
+        'FEEDS': {output: {'format': 'jsonlines'}},
+        'LOG_LEVEL': 'WARNING',
+        **settings,
+    }
+    args = {'start_url': server.url('/sorocaba3/padaria.html')}
+    result = subprocess.run(
+        [sys.executable, '-c', CRAWL_SCRIPT, json.dumps(settings), json.dumps(args)],
+        cwd=os.path.join(ROOT, 'coleta'),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    with open(output, encoding='utf-8') as f:
+        items = [json.loads(line) for line in f]
+    return stats, items
+
+
+def test_profiling_keeps_items_and_records_stats():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(total=TOTAL) as server:
+        report_path = os.path.join(tmp, 'profile.json')
+        stats, items = crawl(
+            server, tmp,
+            PROFILING_ENABLED=True,
+            PROFILING_REPORT=report_path,
+            PROFILING_CPROFILE_TOP=2,
+        )
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        dumps = [page['profile'] for page in report['slowest_pages']]
+        assert all(os.path.exists(path) for path in dumps)
+
+    # Os pipelines envolvidos continuam recebendo e devolvendo todos os itens
+    assert len(items) == TOTAL
+    assert stats['item_scraped_count'] == TOTAL
+    assert all(item['image_path'] for item in items)
+
+    pages = -(-TOTAL // 24)
+    assert stats['profile/spider/parse/calls'] == pages
+    assert stats['profile/spider/parse/items'] == TOTAL
+    assert stats['profile/spider/parse/response_bytes'] > 0
+    assert stats['profile/spider/extract_product_data/calls'] == TOTAL
+    for pipeline in ('ImageProcessingPipeline', 'FilterBase64Pipeline', 'ColetaPipeline'):
+        assert stats[f'profile/pipeline/{pipeline}/calls'] == TOTAL
+        assert stats[f'profile/pipeline/{pipeline}/wall_ms'] > 0
+    histogram = {
+        key: value for key, value in stats.items()
+        if key.startswith('profile/spider/parse/wall_histogram/')
+    }
+    assert sum(histogram.values()) == pages
+    assert stats['profile/report'] == report_path
+
+    assert report['callbacks']['parse']['calls'] == pages
+    assert report['pipelines']['ImageProcessingPipeline']['calls'] == TOTAL
+    assert len(dumps) == 2
+
+
+def test_profiling_disabled_by_default():
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(total=TOTAL) as server:
+        stats, items = crawl(server, tmp)
+
+    assert len(items) == TOTAL
+    assert not [key for key in stats if key.startswith('profile/')]
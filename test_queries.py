@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Testes do argumento `queries` do MercadolivreSpider (várias buscas no mesmo crawl)
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+
+from coleta.spiders.mercadolivre import MercadolivreSpider, parse_query, split_queries
+
+
+FILTERED = 'https://lista.mercadolivre.com.br/tenis_PriceRange_100-300,400-500_NoIndex_True'
+
+
+def test_split_keeps_commas_inside_urls():
+    assert split_queries(f'tenis corrida;5,chuteira, {FILTERED};2, meia') == [
+        'tenis corrida;5', 'chuteira', f' {FILTERED};2', ' meia',
+    ]
+    assert split_queries(f'{FILTERED},https://lista.mercadolivre.com.br/meia,Meia Esportiva') == [
+        FILTERED, 'https://lista.mercadolivre.com.br/meia', 'Meia Esportiva',
+    ]
+
+
+def test_parse_query_limit_and_url():
+    assert parse_query('Tênis Corrida;5') == (
+        'tenis-corrida', 'https://lista.mercadolivre.com.br/tenis-corrida', 5,
+    )
+    assert parse_query(f' {FILTERED};2') == ('tenis-pricerange-100-300-400-500', FILTERED, 2)
+    # ';' sem número não é limite
+    url = 'https://lista.mercadolivre.com.br/meia;jsessionid=abc'
+    assert parse_query(url)[1:] == (url, None)
+
+
+def test_slug_collisions_get_a_suffix():
+    other = 'https://calcados.mercadolivre.com.br/tenis-corrida'
+    spider = MercadolivreSpider(queries=f'tenis corrida,{other},Tênis Corrida')
+    # Mesmo slug com outra URL: sufixo; mesma URL repetida: ignorada
+    assert spider.queries == {
+        'tenis-corrida': ('https://lista.mercadolivre.com.br/tenis-corrida', None),
+        'tenis-corrida-2': (other, None),
+    }
+    assert 'calcados.mercadolivre.com.br' in spider.allowed_domains
+
+
+def test_filtered_url_query_is_not_split():
+    spider = MercadolivreSpider(queries=f'{FILTERED};3, chuteira')
+    assert spider.start_urls == [FILTERED, 'https://lista.mercadolivre.com.br/chuteira']
+    assert [limit for _, limit in spider.queries.values()] == [3, None]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Testes do backend GraphQL do TausteSpider contra o servidor local
+(benchmarks/standin.py), sem acesso ao site real
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from standin import StandInServer
+
+
+TOTAL = 187
+
+
+def crawl(server, *args):
+    """Roda `scrapy crawl tauste` contra o servidor local e devolve os itens"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'items.jl')
+        subprocess.run(
+            [
+                sys.executable, '-m', 'scrapy', 'crawl', 'tauste',
+                '-a', f"start_url={server.url('/sorocaba3/padaria.html')}",
+                *args,
+                '-s', 'ITEM_PIPELINES={}',
+                '-s', 'ADDONS={}',
+                '-s', 'LOG_LEVEL=WARNING',
+                '-o', f'{output}:jsonlines',
+            ],
+            cwd=os.path.join(ROOT, 'coleta'),
+            check=True,
+        )
+        with open(output, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+
+def test_graphql_backend():
+    with StandInServer(total=TOTAL) as server:
+        items = crawl(server, '-a', 'backend=graphql')
+
+    assert len(items) == TOTAL
+    assert len({item['source_id'] for item in items}) == TOTAL
+    assert all(isinstance(item['price_cents'], int) for item in items)
+    assert all(item['product_link'].endswith('.html') for item in items)
+    # 1 request da categoria + 1 página de 200 produtos; nenhuma página HTML
+    assert server.hits['tauste/graphql'] == 2
+    assert server.hits['tauste/html'] == 0
+
+
+def test_graphql_uses_fewer_bytes_than_html():
+    with StandInServer(total=TOTAL) as server:
+        crawl(server, '-a', 'backend=graphql')
+        graphql_bytes = server.bytes_sent['tauste/graphql']
+        html_items = crawl(server)
+        html_bytes = server.bytes_sent['tauste/html']
+
+    assert len(html_items) == TOTAL
+    assert graphql_bytes * 10 < html_bytes
+
+
+def test_html_fallback_when_api_unavailable():
+    with StandInServer(total=TOTAL, graphql=False) as server:
+        items = crawl(server, '-a', 'backend=graphql')
+
+    assert len(items) == TOTAL
+    assert server.hits['tauste/graphql'] == 1
+    assert server.hits['tauste/html'] == -(-TOTAL // 24)
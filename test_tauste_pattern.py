@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testes do extrator por padrão de texto do Tauste (coleta.textproducts)
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'coleta'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fixtures
+from coleta.textproducts import TextProduct, extract_text_products
+
+
+# Orçamento por página de ~360 KB (a regex DOTALL antiga levava minutos)
+PAGE_BUDGET = 0.25
+
+
+def best_time(page, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_text_products(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_markdown_pattern():
+    page = (
+        "1. 107484 Vinho Cartuxa Ea Tinto Seco Portugal Garrafa 750ml **Cartuxa** R$ 69,90 "
+        "2. 107485 Vinho Don Luciano Tinto 750ml **Don Luciano** R$ 1.029,90"
+    )
+    assert extract_text_products(page) == [
+        TextProduct('107484', 'Vinho Cartuxa Ea Tinto Seco Portugal Garrafa 750ml', 'Cartuxa', '69,90'),
+        TextProduct('107485', 'Vinho Don Luciano Tinto 750ml', 'Don Luciano', '1.029,90'),
+    ]
+
+
+def test_bold_tags_as_brand_markers():
+    page = (
+        '<li><a href="/p1">Pão Francês Kg</a> <strong>Tauste</strong>'
+        '<span class="price">R$&nbsp;14,99</span></li>'
+        '<li><a href="/p2">Bolo de Cenoura</a><b>Perini</b><span>R$</span><span>22,5</span></li>'
+    )
+    assert extract_text_products(page) == [
+        TextProduct(None, 'Pão Francês Kg', 'Tauste', '14,99'),
+        TextProduct(None, 'Bolo de Cenoura', 'Perini', '22,5'),
+    ]
+
+
+def test_no_garbage_without_price_after_brand():
+    page = (
+        '<p>Olá **mundo** sem preço</p><strong>Frete grátis</strong> acima de R$ 99'
+        '<script>var t = "Item **Marca** R$ 1,00";</script><!-- **x** R$ 2 -->'
+    )
+    assert extract_text_products(page) == []
+
+
+def test_raw_text_close_tag_any_case():
+    # </Script> fecha o script: o card seguinte não pode ser engolido
+    page = (
+        '<SCRIPT>var t = "**Falso** R$ 1,00";</Script>'
+        '<p>Pão Francês Kg <strong>Tauste</strong> R$ 14,99</p>'
+        '<Style>.a{}</STYLE><p>Bolo de Cenoura **Perini** R$ 22,5</p>'
+    )
+    assert extract_text_products(page) == [
+        TextProduct(None, 'Pão Francês Kg', 'Tauste', '14,99'),
+        TextProduct(None, 'Bolo de Cenoura', 'Perini', '22,5'),
+    ]
+
+
+def test_fixture_pages_within_budget():
+    pages = [open(path, encoding='utf-8', errors='replace').read() for path in fixtures.saved_pages()]
+    pages += [fixtures.tauste_listing_html(page=page) for page in (1, 2)]
+    for page in pages:
+        elapsed = best_time(page)
+        assert elapsed < PAGE_BUDGET, f"{len(page)} caracteres em {elapsed:.3f}s"
+
+
+def test_linear_on_adversarial_input():
+    # Sem par para `**`/`<b>` e sem preço: as regexes antigas eram quadráticas aqui
+    for unit in ('**a', '<b>x', 'Produto R', '1. 2 '):
+        small = best_time(unit * 20_000)
+        large = best_time(unit * 80_000)
+        assert large < 8 * small + 0.05, f"{unit!r}: {small:.3f}s -> {large:.3f}s para 4x a entrada"